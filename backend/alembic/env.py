@@ -1,3 +1,4 @@
+import re
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
@@ -17,6 +18,14 @@ config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
 
 target_metadata = Base.metadata
 
+# FTS5 virtual tables (posts_fts, journals_fts) and their shadow tables are created by raw SQL
+# in 0010_full_text_search and have no models, so autogenerate must not propose dropping them.
+FTS_TABLE = re.compile(r"^\w+_fts(_(data|idx|content|docsize|config))?$")
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    return not (type_ == "table" and FTS_TABLE.match(name))
+
 
 def run_migrations_offline():
     url = config.get_main_option("sqlalchemy.url")
@@ -24,6 +33,7 @@ def run_migrations_offline():
         url=url,
         target_metadata=target_metadata,
         literal_binds=True,
+        include_object=include_object,
         dialect_opts={"paramstyle": "named"},
     )
 
@@ -42,6 +52,7 @@ def run_migrations_online():
         context.configure(
             connection=connection,
             target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,23 @@
+"""feed keyset indexes
+
+Revision ID: 0004_feed_indexes
+Revises: 0003_reports
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from alembic import op
+
+revision = "0004_feed_indexes"
+down_revision = "0003_reports"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_posts_created_at_id", "posts", ["created_at", "id"])
+    op.create_index("ix_posts_category_created_at_id", "posts", ["category", "created_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_posts_category_created_at_id", table_name="posts")
+    op.drop_index("ix_posts_created_at_id", table_name="posts")
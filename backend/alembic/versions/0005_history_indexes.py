@@ -0,0 +1,23 @@
+"""mood and journal history indexes
+
+Revision ID: 0005_history_indexes
+Revises: 0004_feed_indexes
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from alembic import op
+
+revision = "0005_history_indexes"
+down_revision = "0004_feed_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_moods_user_id_created_at", "moods", ["user_id", "created_at"])
+    op.create_index("ix_journals_user_id_created_at", "journals", ["user_id", "created_at"])
+
+
+def downgrade():
+    op.drop_index("ix_journals_user_id_created_at", table_name="journals")
+    op.drop_index("ix_moods_user_id_created_at", table_name="moods")
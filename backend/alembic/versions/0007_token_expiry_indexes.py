@@ -0,0 +1,25 @@
+"""token expiry indexes
+
+Revision ID: 0007_token_expiry_indexes
+Revises: 0006_jobs
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from alembic import op
+
+revision = "0007_token_expiry_indexes"
+down_revision = "0006_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_refresh_tokens_expires_at", "refresh_tokens", ["expires_at"])
+    op.create_index("ix_email_verification_tokens_expires_at", "email_verification_tokens", ["expires_at"])
+    op.create_index("ix_password_reset_tokens_expires_at", "password_reset_tokens", ["expires_at"])
+
+
+def downgrade():
+    op.drop_index("ix_password_reset_tokens_expires_at", table_name="password_reset_tokens")
+    op.drop_index("ix_email_verification_tokens_expires_at", table_name="email_verification_tokens")
+    op.drop_index("ix_refresh_tokens_expires_at", table_name="refresh_tokens")
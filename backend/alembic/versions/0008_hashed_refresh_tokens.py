@@ -0,0 +1,46 @@
+"""hashed refresh tokens and token generation
+
+Revision ID: 0008_hashed_refresh_tokens
+Revises: 0007_token_expiry_indexes
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_hashed_refresh_tokens"
+down_revision = "0007_token_expiry_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("users", sa.Column("token_generation", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("refresh_tokens", sa.Column("token_hash", sa.String(length=64), nullable=True))
+
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, token FROM refresh_tokens")).fetchall()
+    for row_id, token in rows:
+        bind.execute(
+            sa.text("UPDATE refresh_tokens SET token_hash = :token_hash WHERE id = :id"),
+            {"token_hash": hashlib.sha256(token.encode()).hexdigest(), "id": row_id},
+        )
+
+    op.drop_index("ix_refresh_tokens_token", table_name="refresh_tokens")
+    with op.batch_alter_table("refresh_tokens") as batch:
+        batch.drop_column("token")
+        batch.alter_column("token_hash", existing_type=sa.String(length=64), nullable=False)
+    op.create_index("ix_refresh_tokens_token_hash", "refresh_tokens", ["token_hash"], unique=True)
+
+
+def downgrade():
+    # Raw tokens cannot be recovered from their digests, so every session is dropped.
+    op.execute("DELETE FROM refresh_tokens")
+    op.drop_index("ix_refresh_tokens_token_hash", table_name="refresh_tokens")
+    with op.batch_alter_table("refresh_tokens") as batch:
+        batch.drop_column("token_hash")
+        batch.add_column(sa.Column("token", sa.String(), nullable=False))
+    op.create_index("ix_refresh_tokens_token", "refresh_tokens", ["token"], unique=True)
+    op.drop_column("users", "token_generation")
@@ -0,0 +1,55 @@
+"""mood daily rollups
+
+Revision ID: 0009_mood_daily_rollups
+Revises: 0008_hashed_refresh_tokens
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from collections import Counter
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009_mood_daily_rollups"
+down_revision = "0008_hashed_refresh_tokens"
+branch_labels = None
+depends_on = None
+
+
+def _normalize(value):
+    return " ".join((value or "").split()).casefold()
+
+
+def upgrade():
+    rollups = op.create_table(
+        "mood_daily_rollups",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("dimension", sa.String(length=16), primary_key=True),
+        sa.Column("value", sa.String(), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    # Backfill from existing entries; same normalization as app.services.mood_stats.
+    counts = Counter()
+    query = sa.text("SELECT user_id, created_at, mood, energy FROM moods").columns(created_at=sa.DateTime())
+    result = op.get_bind().execute(query)
+    for user_id, created_at, mood, energy in result:
+        if created_at is None:
+            continue
+        day = created_at.date()
+        counts[(user_id, day, "mood", _normalize(mood))] += 1
+        if _normalize(energy):
+            counts[(user_id, day, "energy", _normalize(energy))] += 1
+    if counts:
+        op.bulk_insert(
+            rollups,
+            [
+                {"user_id": user_id, "day": day, "dimension": dimension, "value": value, "count": count}
+                for (user_id, day, dimension, value), count in counts.items()
+            ],
+        )
+
+
+def downgrade():
+    op.drop_table("mood_daily_rollups")
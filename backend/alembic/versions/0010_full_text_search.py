@@ -0,0 +1,92 @@
+"""full text search over posts and journals
+
+Revision ID: 0010_full_text_search
+Revises: 0009_mood_daily_rollups
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from alembic import op
+
+revision = "0010_full_text_search"
+down_revision = "0009_mood_daily_rollups"
+branch_labels = None
+depends_on = None
+
+# SQLite keeps FTS5 external-content indexes in sync with triggers. These are dropped if
+# the base table is ever rebuilt (e.g. by batch_alter_table), so later migrations that
+# rebuild posts or journals must recreate them.
+SQLITE_FTS = {
+    "posts": ["title", "body"],
+    "journals": ["title", "body", "gratitude"],
+}
+
+# Postgres uses weighted generated tsvector columns (no triggers needed) with GIN indexes.
+POSTGRES_VECTORS = {
+    "posts": "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(body, '')), 'B')",
+    "journals": "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(body, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(gratitude, '')), 'C')",
+}
+
+
+def _sqlite_upgrade():
+    for table, columns in SQLITE_FTS.items():
+        fts = f"{table}_fts"
+        cols = ", ".join(columns)
+        new_values = ", ".join(f"new.{column}" for column in columns)
+        old_values = ", ".join(f"old.{column}" for column in columns)
+        op.execute(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='id', "
+            "tokenize='porter unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+        )
+        op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def _sqlite_downgrade():
+    for table in SQLITE_FTS:
+        fts = f"{table}_fts"
+        for suffix in ("ai", "ad", "au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+        op.execute(f"DROP TABLE IF EXISTS {fts}")
+
+
+def _postgres_upgrade():
+    for table, expression in POSTGRES_VECTORS.items():
+        op.execute(f"ALTER TABLE {table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({expression}) STORED")
+        op.execute(f"CREATE INDEX ix_{table}_search_vector ON {table} USING GIN (search_vector)")
+
+
+def _postgres_downgrade():
+    for table in POSTGRES_VECTORS:
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_search_vector")
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        _sqlite_upgrade()
+    elif dialect == "postgresql":
+        _postgres_upgrade()
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        _sqlite_downgrade()
+    elif dialect == "postgresql":
+        _postgres_downgrade()
@@ -0,0 +1,26 @@
+"""resource versions for conditional GET
+
+Revision ID: 0011_resource_versions
+Revises: 0010_full_text_search
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011_resource_versions"
+down_revision = "0010_full_text_search"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "resource_versions",
+        sa.Column("scope", sa.String(), primary_key=True),
+        sa.Column("version", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade():
+    op.drop_table("resource_versions")
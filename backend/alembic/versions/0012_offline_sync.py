@@ -0,0 +1,50 @@
+"""offline sync keys, versions and tombstones
+
+Revision ID: 0012_offline_sync
+Revises: 0011_resource_versions
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0012_offline_sync"
+down_revision = "0011_resource_versions"
+branch_labels = None
+depends_on = None
+
+# Plain add_column (no batch rebuild) keeps the SQLite FTS triggers on journals intact.
+
+
+def upgrade():
+    for table in ("moods", "journals"):
+        op.add_column(table, sa.Column("client_id", sa.String(length=64), nullable=True))
+        op.add_column(table, sa.Column("sync_version", sa.Integer(), nullable=False, server_default="0"))
+        op.create_index(f"ix_{table}_user_id_client_id", table, ["user_id", "client_id"], unique=True)
+        op.create_index(f"ix_{table}_user_id_sync_version_id", table, ["user_id", "sync_version", "id"])
+
+    op.create_table(
+        "sync_tombstones",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("resource", sa.String(length=16), nullable=False),
+        sa.Column("entry_id", sa.Integer(), nullable=False),
+        sa.Column("client_id", sa.String(length=64), nullable=True),
+        sa.Column("sync_version", sa.Integer(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index(
+        "ix_sync_tombstones_user_id_resource_sync_version_id",
+        "sync_tombstones",
+        ["user_id", "resource", "sync_version", "id"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_sync_tombstones_user_id_resource_sync_version_id", table_name="sync_tombstones")
+    op.drop_table("sync_tombstones")
+    for table in ("journals", "moods"):
+        op.drop_index(f"ix_{table}_user_id_sync_version_id", table_name=table)
+        op.drop_index(f"ix_{table}_user_id_client_id", table_name=table)
+        op.drop_column(table, "sync_version")
+        op.drop_column(table, "client_id")
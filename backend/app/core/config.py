@@ -3,17 +3,124 @@ from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+
+def to_psycopg_url(url: str) -> str:
+    # requirements.txt ships psycopg 3, so bare postgres URLs must not resolve to psycopg2.
+    for prefix in ("postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return url.replace(prefix, "postgresql+psycopg://", 1)
+    return url
+
+
+def to_async_url(url: str) -> str:
+    if url.startswith("sqlite:///"):
+        return url.replace("sqlite:///", "sqlite+aiosqlite:///", 1)
+    return to_psycopg_url(url)
+
 class Settings:
     PROJECT_NAME = "Selenly API"
-    DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{BASE_DIR / 'selenly.db'}")
+    DATABASE_URL = to_psycopg_url(os.getenv("DATABASE_URL", f"sqlite:///{BASE_DIR / 'selenly.db'}"))
     SQLITE_CONNECT_ARGS = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+    # Pool sizing is per engine per worker process: total connections ~= workers * (size + overflow).
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT_SECONDS = int(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
     JWT_SECRET = os.getenv("JWT_SECRET", "dev-change-me")
     JWT_ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
     REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+    # Authenticated users are cached per process. Unless USER_CACHE_BACKEND=redis, other workers see
+    # flag changes (is_admin, is_active) made elsewhere after at most this TTL.
+    USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+    # "redis" checks a per-user version key on every request, so changes and logout-all reach
+    # all workers at once; "memory" relies on the TTL alone.
+    USER_CACHE_BACKEND = os.getenv("USER_CACHE_BACKEND", "memory")
     JWT_REFRESH_SECRET = os.getenv("JWT_REFRESH_SECRET", "dev-refresh-change-me")
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    # 0 hashes in the threadpool instead of a dedicated process pool.
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4.1")
+    # Point at a local stub (see scripts/fake_openai.py) for offline testing.
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+    OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "30"))
+    # Retries use the SDK's exponential backoff with jitter.
+    OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+    OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "32"))
+    CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "2000"))
+    CHAT_HISTORY_SUMMARY = os.getenv("CHAT_HISTORY_SUMMARY", "false").lower() == "true"
+    CHAT_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS", "250"))
+    # Newline-separated phrase list replacing app/services/crisis_phrases.txt.
+    CRISIS_PHRASES_PATH = os.getenv("CRISIS_PHRASES_PATH") or None
+    OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    CHAT_CACHE_ENABLED = os.getenv("CHAT_CACHE_ENABLED", "false").lower() == "true"
+    CHAT_CACHE_BACKEND = os.getenv("CHAT_CACHE_BACKEND", "memory")
+    CHAT_CACHE_TTL_SECONDS = int(os.getenv("CHAT_CACHE_TTL_SECONDS", "3600"))
+    CHAT_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "5000"))
+    # 0 disables the embedding tier; ~0.95 cosine similarity is a reasonable starting point.
+    CHAT_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("CHAT_CACHE_SIMILARITY_THRESHOLD", "0"))
+    CHAT_CACHE_SEMANTIC_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_SEMANTIC_MAX_ENTRIES", "512"))
+    # Newest embeddings compared per lookup; 0 compares all of them.
+    CHAT_CACHE_SEMANTIC_SCAN_LIMIT = int(os.getenv("CHAT_CACHE_SEMANTIC_SCAN_LIMIT", "256"))
+    # "memory" runs jobs on the API's event loop; "sql" stores them in the jobs table for `python -m app.worker`.
+    JOB_BACKEND = os.getenv("JOB_BACKEND", "memory")
+    JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "4"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+    JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "2"))
+    JOB_QUEUE_MAX_SIZE = int(os.getenv("JOB_QUEUE_MAX_SIZE", "1000"))
+    JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1"))
+    JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+    TOKEN_SWEEP_BATCH_SIZE = int(os.getenv("TOKEN_SWEEP_BATCH_SIZE", "1000"))
+    # 0 disables the in-app sweeper; run scripts/sweep_tokens.py from cron instead.
+    TOKEN_SWEEP_INTERVAL_SECONDS = int(os.getenv("TOKEN_SWEEP_INTERVAL_SECONDS", "0"))
+    # First pages of the public feed, pre-serialized per category; "redis" shares them across workers.
+    FEED_CACHE_ENABLED = os.getenv("FEED_CACHE_ENABLED", "true").lower() == "true"
+    FEED_CACHE_BACKEND = os.getenv("FEED_CACHE_BACKEND", "memory")
+    FEED_CACHE_TTL_SECONDS = int(os.getenv("FEED_CACHE_TTL_SECONDS", "300"))
+    FEED_CACHE_MAX_ENTRIES = int(os.getenv("FEED_CACHE_MAX_ENTRIES", "256"))
+    # Upper bound on creates + updates + deletes in one offline-sync batch, and on /changes page size.
+    SYNC_MAX_BATCH_SIZE = int(os.getenv("SYNC_MAX_BATCH_SIZE", "500"))
+    # Tombstones older than this are pruned by the token sweeper; clients idle longer must resync. 0 keeps them.
+    SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "90"))
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    # "redis" shares buckets between workers; "memory" limits each worker separately.
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    # Applies to routes without a specific rule; empty disables it.
+    RATE_LIMIT_DEFAULT = os.getenv("RATE_LIMIT_DEFAULT", "300/minute")
+    # Comma-separated "METHOD /path=count/period" overrides, e.g. "POST /auth/login=5/minute".
+    RATE_LIMIT_RULES = os.getenv("RATE_LIMIT_RULES", "")
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+    # Take the client IP from X-Forwarded-For (only behind a trusted proxy, e.g. Render). The client
+    # can prepend anything, so the address is read RATE_LIMIT_TRUSTED_HOPS entries from the right:
+    # 1 = the address the last (our) proxy saw.
+    RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+    RATE_LIMIT_TRUSTED_HOPS = int(os.getenv("RATE_LIMIT_TRUSTED_HOPS", "1"))
+    # Requests in flight per worker before new ones wait; 0 disables the cap.
+    MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "256"))
+    ADMISSION_WAIT_SECONDS = float(os.getenv("ADMISSION_WAIT_SECONDS", "0.5"))
+    ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "2"))
+    # Prometheus metrics at /metrics; counters are per worker process.
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    # Statements at or above this duration are logged and counted; 0 disables.
+    SQL_SLOW_QUERY_MS = int(os.getenv("SQL_SLOW_QUERY_MS", "250"))
+    # Log the plan of each distinct slow SELECT once per worker (one extra EXPLAIN round trip).
+    SQL_EXPLAIN_SLOW_QUERIES = os.getenv("SQL_EXPLAIN_SLOW_QUERIES", "false").lower() == "true"
+    # Flag requests that run one statement this many times (N+1 patterns); 0 disables.
+    SQL_REPEATED_QUERY_THRESHOLD = int(os.getenv("SQL_REPEATED_QUERY_THRESHOLD", "10"))
+    # Adds "Server-Timing: db;dur=..;desc=\"N queries\", app;dur=.." to responses.
+    SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() == "true"
+    # Encode JSON with orjson; hot list routes also skip response_model validation of their rows.
+    ORJSON_RESPONSES = os.getenv("ORJSON_RESPONSES", "false").lower() == "true"
+    # max-age sent with ETag'd read responses; 0 makes clients revalidate on every poll.
+    HTTP_CACHE_MAX_AGE_SECONDS = int(os.getenv("HTTP_CACHE_MAX_AGE_SECONDS", "0"))
+    EMAIL_FROM = os.getenv("EMAIL_FROM", "no-reply@selenly.app")
+    FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
     CORS_ORIGINS = [
         origin.strip()
         for origin in os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
@@ -0,0 +1,84 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db import async_engine, upsert_insert
+from app.models import ResourceVersion
+
+POSTS_SCOPE = "posts"
+
+
+def user_scope(resource: str, user_id: int) -> str:
+    return f"{resource}:{user_id}"
+
+
+def version_bump_statement(dialect_name: str, scope: str):
+    stmt = upsert_insert(dialect_name)(ResourceVersion).values(scope=scope, version=1)
+    return stmt.on_conflict_do_update(
+        index_elements=["scope"],
+        set_={"version": ResourceVersion.version + 1},
+    )
+
+
+async def bump_version(db: AsyncSession, scope: str) -> int:
+    """Invalidate ETags for ``scope`` and return the new version.
+
+    Runs in the caller's transaction, so it commits with the write. The upsert also locks
+    the scope's row until then, so writes to one scope commit in version order.
+    """
+    stmt = version_bump_statement(async_engine.dialect.name, scope).returning(ResourceVersion.version)
+    return await db.scalar(stmt)
+
+
+async def get_version(db: AsyncSession, scope: str) -> int:
+    return await db.scalar(select(ResourceVersion.version).where(ResourceVersion.scope == scope)) or 0
+
+
+def compute_etag(scope: str, version: int, request: Request) -> str:
+    # The query string is part of the tag so each page/filter of a list validates separately.
+    digest = hashlib.sha1(f"{scope}\x00{request.url.path}\x00{request.url.query}".encode()).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison against an ``If-None-Match`` header (RFC 9110 §13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+async def conditional_get(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    scope: str,
+    private: bool = True,
+    version: Optional[int] = None,
+) -> Optional[Response]:
+    """Tag ``response`` with the scope's ETag and caching headers.
+
+    Returns a ready 304 response when the client's copy is current, so the route can skip
+    its query and serialization entirely; otherwise returns ``None``. The version is read
+    before the route's own query, so a concurrent write can only make the body newer than
+    its tag, never older. Pass ``version`` if the route already looked it up.
+    """
+    if version is None:
+        version = await get_version(db, scope)
+    etag = compute_etag(scope, version, request)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"{'private' if private else 'public'}, max-age={settings.HTTP_CACHE_MAX_AGE_SECONDS}, must-revalidate",
+    }
+    if private:
+        headers["Vary"] = "Authorization"
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,189 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import and_, or_, select
+
+from app.core.config import settings
+from app.db import AsyncSessionLocal, async_engine
+from app.models import Job
+
+logger = logging.getLogger("selenly.jobs")
+
+handlers: Dict[str, Callable[..., Awaitable[None]]] = {}
+
+
+def job(name: str):
+    """Register an async function as the handler for jobs called ``name``."""
+    def decorator(func):
+        handlers[name] = func
+        return func
+    return decorator
+
+
+def retry_delay(attempts: int) -> float:
+    return min(settings.JOB_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), 300.0)
+
+
+async def run_handler(name: str, payload: dict) -> None:
+    handler = handlers.get(name)
+    if handler is None:
+        raise RuntimeError(f"No handler registered for job {name!r}")
+    await handler(**payload)
+
+
+class MemoryQueue:
+    """Bounded asyncio queue drained by ``JOB_CONCURRENCY`` worker tasks on the current loop.
+
+    Jobs are lost if the process exits, and dropped (with an error log) when the queue is
+    full rather than stalling the request that enqueues them; use the SQL backend for
+    anything that must survive.
+    """
+
+    def __init__(self, concurrency: int, max_size: int):
+        self.concurrency = concurrency
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list = []
+        self._retries: set = set()
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for task in [*self._workers, *self._retries]:
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._retries, return_exceptions=True)
+        self._workers = []
+        self._retries = set()
+        self._queue = None
+
+    async def enqueue(self, name: str, payload: dict, attempts: int = 0) -> None:
+        if self._queue is None:
+            # No running workers (scripts, tests): run inline so the side effect still happens.
+            await run_handler(name, payload)
+            return
+        try:
+            self._queue.put_nowait((name, payload, attempts))
+        except asyncio.QueueFull:
+            logger.error("job=%s dropped: queue full (%s jobs waiting)", name, self.max_size)
+
+    async def _retry_later(self, name: str, payload: dict, attempts: int) -> None:
+        await asyncio.sleep(retry_delay(attempts))
+        await self.enqueue(name, payload, attempts)
+
+    async def _work(self) -> None:
+        while True:
+            name, payload, attempts = await self._queue.get()
+            attempts += 1
+            try:
+                await run_handler(name, payload)
+            except Exception:
+                if attempts >= settings.JOB_MAX_ATTEMPTS:
+                    logger.exception("job=%s failed permanently after %s attempts", name, attempts)
+                else:
+                    logger.warning("job=%s attempt=%s failed; retrying", name, attempts, exc_info=True)
+                    task = asyncio.create_task(self._retry_later(name, payload, attempts))
+                    self._retries.add(task)
+                    task.add_done_callback(self._retries.discard)
+            finally:
+                self._queue.task_done()
+
+
+class SQLQueue:
+    """Durable queue backed by the ``jobs`` table.
+
+    The API only inserts rows; ``python -m app.worker`` claims due rows under a lease (with
+    ``SKIP LOCKED`` on Postgres, so several workers can share the table), runs them and
+    deletes them on success. Failed jobs are rescheduled with exponential backoff and kept
+    with ``status='failed'`` once they run out of attempts.
+    """
+
+    async def start(self) -> None:
+        return None
+
+    async def stop(self) -> None:
+        return None
+
+    async def enqueue(self, name: str, payload: dict) -> None:
+        async with AsyncSessionLocal() as db:
+            db.add(Job(name=name, payload=json.dumps(payload)))
+            await db.commit()
+
+    async def claim(self, limit: int) -> list:
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            stmt = (
+                select(Job)
+                .where(
+                    or_(
+                        and_(Job.status == "pending", Job.run_at <= now),
+                        and_(Job.status == "running", Job.locked_until < now),
+                    )
+                )
+                .order_by(Job.run_at)
+                .limit(limit)
+            )
+            if async_engine.dialect.name == "postgresql":
+                stmt = stmt.with_for_update(skip_locked=True)
+            jobs = (await db.execute(stmt)).scalars().all()
+            for claimed in jobs:
+                claimed.status = "running"
+                claimed.attempts += 1
+                claimed.locked_until = now + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+            await db.commit()
+            return [(claimed.id, claimed.name, json.loads(claimed.payload), claimed.attempts) for claimed in jobs]
+
+    async def finish(self, job_id: int, attempts: int, error: Optional[str]) -> None:
+        async with AsyncSessionLocal() as db:
+            claimed = await db.get(Job, job_id)
+            if claimed is None:
+                return
+            if error is None:
+                await db.delete(claimed)
+            elif attempts >= settings.JOB_MAX_ATTEMPTS:
+                claimed.status = "failed"
+                claimed.last_error = error
+            else:
+                claimed.status = "pending"
+                claimed.last_error = error
+                claimed.run_at = datetime.utcnow() + timedelta(seconds=retry_delay(attempts))
+            await db.commit()
+
+    async def run_once(self) -> int:
+        claimed = await self.claim(settings.JOB_CONCURRENCY)
+
+        async def execute(job_id, name, payload, attempts):
+            try:
+                await run_handler(name, payload)
+            except Exception as exc:
+                logger.warning("job=%s id=%s attempt=%s failed", name, job_id, attempts, exc_info=True)
+                await self.finish(job_id, attempts, repr(exc))
+            else:
+                await self.finish(job_id, attempts, None)
+
+        await asyncio.gather(*(execute(*item) for item in claimed))
+        return len(claimed)
+
+    async def run_forever(self) -> None:
+        while True:
+            if not await self.run_once():
+                await asyncio.sleep(settings.JOB_POLL_INTERVAL_SECONDS)
+
+
+def build_queue():
+    if settings.JOB_BACKEND == "sql":
+        return SQLQueue()
+    return MemoryQueue(settings.JOB_CONCURRENCY, settings.JOB_QUEUE_MAX_SIZE)
+
+
+job_queue = build_queue()
+
+
+async def enqueue(name: str, **payload) -> None:
+    await job_queue.enqueue(name, payload)
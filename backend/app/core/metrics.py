@@ -0,0 +1,367 @@
+import hashlib
+import logging
+import time
+from collections import Counter as StatementCounter, OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+
+from app.core import rate_limit
+from app.core.config import settings
+from app.db import pool_stats
+
+logger = logging.getLogger("selenly.sql")
+
+# Chat streams can stay open for tens of seconds, so the top buckets go past the client defaults.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+HTTP_REQUESTS = Counter(
+    "selenly_http_requests_total", "HTTP requests by route template and status.", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "selenly_http_request_duration_seconds",
+    "Time until the last body chunk was sent.",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge("selenly_http_requests_in_flight", "Requests currently being handled by this worker.")
+DB_QUERIES_PER_REQUEST = Histogram(
+    "selenly_db_queries_per_request", "SQL statements executed per request.", ["route"], buckets=QUERY_COUNT_BUCKETS
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "selenly_db_time_per_request_seconds", "Time spent in SQL statements per request.", ["route"], buckets=LATENCY_BUCKETS
+)
+DB_QUERY_LATENCY = Histogram(
+    "selenly_db_query_duration_seconds", "Latency of single SQL statements.", ["operation"], buckets=LATENCY_BUCKETS
+)
+DB_SLOW_QUERIES = Counter(
+    "selenly_db_slow_queries_total", "Statements slower than SQL_SLOW_QUERY_MS.", ["route", "operation"]
+)
+DB_REPEATED_STATEMENTS = Counter(
+    "selenly_db_repeated_statements_total",
+    "Requests that ran one statement at least SQL_REPEATED_QUERY_THRESHOLD times (likely N+1).",
+    ["route"],
+)
+OPENAI_LATENCY = Histogram(
+    "selenly_openai_request_duration_seconds",
+    "OpenAI call latency, excluding time queued for an upstream slot.",
+    ["operation", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+OPENAI_IN_FLIGHT = Gauge("selenly_openai_requests_in_flight", "OpenAI calls currently open.")
+OPENAI_TOKENS = Counter("selenly_openai_tokens_total", "Tokens reported by OpenAI usage.", ["operation", "kind"])
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    scope: Optional[dict] = None
+    # Executions per statement text; only kept when repeated-statement detection is on.
+    statements: StatementCounter = field(default_factory=StatementCounter)
+
+
+# Set per request by MetricsMiddleware; the object is shared, so queries run from
+# SQLAlchemy's greenlets and spawned tasks still add to the request that started them.
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("selenly_query_stats", default=None)
+
+
+def _operation(statement: str) -> str:
+    word = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return word if word in _OPERATIONS else "OTHER"
+
+
+def _truncate(statement: str, limit: int = 500) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + "…"
+
+
+# Plans are captured once per statement text per worker, so a hot slow query costs one EXPLAIN.
+_explained: "OrderedDict[str, None]" = OrderedDict()
+_EXPLAINED_MAX = 512
+
+
+def _first_explain(statement: str) -> bool:
+    digest = hashlib.sha1(statement.encode()).hexdigest()
+    if digest in _explained:
+        return False
+    _explained[digest] = None
+    while len(_explained) > _EXPLAINED_MAX:
+        _explained.popitem(last=False)
+    return True
+
+
+def explain(conn, statement: str, parameters) -> Optional[str]:
+    """Plan for a statement that just ran, via a raw cursor so it is not itself instrumented.
+
+    Only plans are requested (``EXPLAIN`` / ``EXPLAIN QUERY PLAN``), nothing is executed
+    again. On Postgres it runs inside a savepoint so a failure cannot abort the caller's
+    transaction.
+    """
+    postgres = conn.dialect.name == "postgresql"
+    prefix = "EXPLAIN " if postgres else "EXPLAIN QUERY PLAN "
+    cursor = conn.connection.cursor()
+    try:
+        if postgres:
+            cursor.execute("SAVEPOINT selenly_explain")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        finally:
+            if postgres:
+                cursor.execute("ROLLBACK TO SAVEPOINT selenly_explain")
+                cursor.execute("RELEASE SAVEPOINT selenly_explain")
+    except Exception:
+        logger.debug("EXPLAIN failed", exc_info=True)
+        return None
+    finally:
+        cursor.close()
+    # Postgres returns one text column; SQLite's detail is the last column.
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def _record_slow_query(conn, statement: str, parameters, executemany: bool, elapsed: float, stats: Optional[QueryStats]) -> None:
+    route = route_label(stats.scope) if stats is not None and stats.scope is not None else "background"
+    operation = _operation(statement)
+    DB_SLOW_QUERIES.labels(route, operation).inc()
+    plan = None
+    if settings.SQL_EXPLAIN_SLOW_QUERIES and operation in ("SELECT", "WITH") and not executemany and _first_explain(statement):
+        plan = explain(conn, statement, parameters)
+    # Parameters are never logged: they can hold journal text and tokens.
+    logger.warning(
+        "slow_query route=%s duration_ms=%.2f statement=%s%s",
+        route,
+        elapsed * 1000,
+        _truncate(statement),
+        f"\nplan:\n{plan}" if plan else "",
+    )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("selenly_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("selenly_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    DB_QUERY_LATENCY.labels(_operation(statement)).observe(elapsed)
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        if settings.SQL_REPEATED_QUERY_THRESHOLD > 0:
+            stats.statements[statement] += 1
+    if settings.SQL_SLOW_QUERY_MS > 0 and elapsed * 1000 >= settings.SQL_SLOW_QUERY_MS:
+        _record_slow_query(conn, statement, parameters, executemany, elapsed, stats)
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute is skipped for failed statements; drop their start time.
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("selenly_query_start"):
+        connection.info["selenly_query_start"].pop()
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement on ``engine`` (a sync ``Engine``, e.g. ``async_engine.sync_engine``)."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def route_label(scope) -> str:
+    # The route template keeps label cardinality bounded; 404s and requests rejected
+    # before routing (429/503) share one label.
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def repeated_statements(stats: QueryStats) -> List[Tuple[str, int]]:
+    threshold = settings.SQL_REPEATED_QUERY_THRESHOLD
+    if threshold <= 0:
+        return []
+    return [(statement, count) for statement, count in stats.statements.most_common() if count >= threshold]
+
+
+def server_timing(stats: QueryStats, elapsed: float) -> bytes:
+    return (
+        f'db;dur={stats.seconds * 1000:.2f};desc="{stats.count} queries", app;dur={elapsed * 1000:.2f}'
+    ).encode()
+
+
+class MetricsMiddleware:
+    """Request count, latency and SQL usage per route template.
+
+    Plain ASGI so streamed responses are timed until their last chunk. Also flags requests
+    that repeat one statement (N+1 patterns) and, with ``SERVER_TIMING_ENABLED``, reports the
+    SQL time spent before the response started in a ``Server-Timing`` header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        stats = QueryStats(scope=scope)
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.SERVER_TIMING_ENABLED:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing(stats, time.perf_counter() - start)))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        token = _query_stats.set(stats)
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            _query_stats.reset(token)
+            route = route_label(scope)
+            HTTP_REQUESTS.labels(scope["method"], route, str(status)).inc()
+            HTTP_LATENCY.labels(scope["method"], route).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.count)
+            DB_TIME_PER_REQUEST.labels(route).observe(stats.seconds)
+            repeated = repeated_statements(stats)
+            if repeated:
+                DB_REPEATED_STATEMENTS.labels(route).inc()
+                statement, count = repeated[0]
+                logger.warning(
+                    "repeated_query route=%s method=%s executions=%s total_queries=%s statement=%s",
+                    route,
+                    scope["method"],
+                    count,
+                    stats.count,
+                    _truncate(statement),
+                )
+
+
+@contextmanager
+def openai_call(operation: str):
+    """Time one OpenAI call; wrap only the upstream request, not the wait for a slot."""
+    OPENAI_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    outcome = "cancelled"
+    try:
+        yield
+        outcome = "ok"
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        OPENAI_IN_FLIGHT.dec()
+        OPENAI_LATENCY.labels(operation, outcome).observe(time.perf_counter() - start)
+
+
+def record_openai_usage(operation: str, usage) -> None:
+    """Count tokens from a Responses (input/output) or Embeddings (prompt) ``usage`` object."""
+    if usage is None:
+        return
+    for kind, attrs in (("input", ("input_tokens", "prompt_tokens")), ("output", ("output_tokens", "completion_tokens"))):
+        for attr in attrs:
+            value = getattr(usage, attr, None)
+            if value:
+                OPENAI_TOKENS.labels(operation, kind).inc(value)
+                break
+
+
+def cache_stats() -> Dict[str, dict]:
+    """Hit/miss counters of the in-process caches, keyed by cache name.
+
+    Imported here rather than at module level because ``ai`` itself imports this module.
+    """
+    from app.core.security import user_cache
+    from app.services.ai import summary_cache_stats
+    from app.services.feed_cache import feed_cache
+    from app.services.response_cache import response_cache
+
+    caches = {"user": user_cache.stats(), "summary": summary_cache_stats()}
+    if response_cache is not None:
+        chat = response_cache.stats()
+        caches["chat"] = {
+            "hits": chat["exact_hits"] + chat["semantic_hits"],
+            "semantic_hits": chat["semantic_hits"],
+            "misses": chat["misses"],
+            "errors": chat["errors"],
+            "entries": chat["semantic_entries"],
+        }
+    if feed_cache is not None:
+        caches["feed"] = feed_cache.stats()
+    return caches
+
+
+class _RuntimeCollector:
+    """Reads pool, admission and cache counters at scrape time instead of mirroring every change."""
+
+    @staticmethod
+    def _cache_families() -> Dict[str, object]:
+        return {
+            "hits": CounterMetricFamily("selenly_cache_hits", "Cache hits.", labels=["cache"]),
+            "semantic_hits": CounterMetricFamily("selenly_cache_semantic_hits", "Chat replies served by embedding similarity.", labels=["cache"]),
+            "misses": CounterMetricFamily("selenly_cache_misses", "Cache misses.", labels=["cache"]),
+            "errors": CounterMetricFamily("selenly_cache_errors", "Cache backend failures (treated as misses).", labels=["cache"]),
+            "entries": GaugeMetricFamily("selenly_cache_entries", "Entries held in this worker.", labels=["cache"]),
+        }
+
+    def describe(self):
+        # Without describe() the registry calls collect() on registration, while the
+        # cache modules are still importing this one.
+        yield from self._runtime()
+        yield from self._cache_families().values()
+
+    def collect(self):
+        yield from self._runtime()
+        families = self._cache_families()
+        for cache, stats in cache_stats().items():
+            for name, value in stats.items():
+                families[name].add_metric([cache], value)
+        yield from families.values()
+
+    def _runtime(self):
+        stats = pool_stats()
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            if name in stats:
+                yield GaugeMetricFamily(f"selenly_db_pool_{name}", f"Connection pool {name}.", value=stats[name])
+        for name in ("connects", "checkouts", "checkins", "invalidated"):
+            yield CounterMetricFamily(f"selenly_db_pool_{name}", f"Connection pool {name}.", value=stats[name])
+
+        counters = rate_limit.counters
+        yield GaugeMetricFamily(
+            "selenly_admission_in_flight", "Requests holding a concurrency slot.", value=counters["in_flight"]
+        )
+        rejected = CounterMetricFamily("selenly_admission_rejected", "Requests rejected by admission control.", labels=["reason"])
+        rejected.add_metric(["rate_limited"], counters["limited"])
+        rejected.add_metric(["shed"], counters["shed"])
+        yield rejected
+        yield CounterMetricFamily(
+            "selenly_admission_store_errors", "Rate-limit store failures (requests allowed).", value=counters["errors"]
+        )
+
+
+REGISTRY.register(_RuntimeCollector())
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,98 @@
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert an offset-aware datetime to the naive UTC the ``DateTime`` columns store.
+
+    Naive values are assumed to already be UTC and pass through unchanged.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_paginate(query, model, cursor: Optional[str], limit: int):
+    """Return one page of ``query`` ordered newest first, plus the cursor for the next page.
+
+    Works on both legacy ``Query`` objects and 2.0 ``select()`` statements; the caller
+    executes the returned query. Ordering is ``(created_at, id)`` descending so ties on
+    ``created_at`` are broken deterministically.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(
+            or_(
+                model.created_at < created_at,
+                and_(model.created_at == created_at, model.id < row_id),
+            )
+        )
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+def split_page(rows, limit: int) -> Tuple[list, Optional[str]]:
+    """Trim the look-ahead row; returns the page and the cursor for the next one, if any."""
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, encode_cursor(last.created_at, last.id)
+    return rows, None
+
+
+def finalize_page(rows, limit: int, response: Response):
+    """Trim the look-ahead row and expose the next cursor via the ``X-Next-Cursor`` header."""
+    rows, next_cursor = split_page(rows, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
+
+
+def encode_offset_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode().rstrip("=")
+
+
+def decode_offset_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = int(json.loads(base64.urlsafe_b64decode(padded.encode()))["offset"])
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return offset
+
+
+def finalize_offset_page(rows, limit: int, offset: int, response: Response):
+    """Offset counterpart of ``finalize_page`` for result orders that have no stable key
+    (e.g. search relevance); the header carries an opaque cursor all the same."""
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_offset_cursor(offset + limit)
+    return rows
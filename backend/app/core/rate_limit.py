@@ -0,0 +1,251 @@
+import asyncio
+import json
+import logging
+import math
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from jose import JWTError, jwt
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger("selenly.rate_limit")
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+# Expensive or abusable endpoints; RATE_LIMIT_RULES overrides or extends these.
+DEFAULT_RULES = {
+    "POST /auth/login": "10/minute",
+    "POST /auth/signup": "5/minute",
+    "POST /auth/refresh": "30/minute",
+    "POST /auth/request-password-reset": "5/minute",
+    "POST /auth/request-verification": "5/minute",
+    "POST /ai/chat": "20/minute",
+    "POST /ai/chat/stream": "20/minute",
+    "POST /reports": "10/minute",
+}
+
+EXEMPT_PATHS = {"/", "/health", "/metrics", "/docs", "/redoc", "/openapi.json"}
+
+counters = {"limited": 0, "shed": 0, "errors": 0, "in_flight": 0}
+
+
+@dataclass(frozen=True)
+class Rate:
+    capacity: int
+    per_second: float
+
+    @classmethod
+    def parse(cls, spec: str) -> "Rate":
+        """Parse ``"<count>/<second|minute|hour|day>"``; the count is also the burst size."""
+        count, _, period = spec.strip().partition("/")
+        if period not in _PERIODS or int(count) <= 0:
+            raise ValueError(f"Invalid rate limit {spec!r}")
+        return cls(capacity=int(count), per_second=int(count) / _PERIODS[period])
+
+
+def parse_rules(spec: str) -> Dict[str, Rate]:
+    """Parse ``"POST /auth/login=10/minute,POST /ai/chat=20/minute"``."""
+    rules = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        route, _, rate = item.rpartition("=")
+        method, _, path = route.strip().partition(" ")
+        rules[f"{method.upper()} {normalize_path(path)}"] = Rate.parse(rate)
+    return rules
+
+
+def normalize_path(path: str) -> str:
+    """Strip trailing slashes and write numeric ids as ``{id}``, so ``/posts/7`` and
+    ``/posts/8`` share one bucket."""
+    return _ID_SEGMENT.sub("/{id}", path.rstrip("/")) or "/"
+
+
+class MemoryBucketStore:
+    """Per-process token buckets, LRU-bounded to ``max_keys`` entries."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rate: Rate) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (float(rate.capacity), now))
+        tokens = min(float(rate.capacity), tokens + (now - updated) * rate.per_second)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate.per_second
+
+
+# Refill-and-take in one round trip; uses the Redis clock so all workers agree on "now".
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+else
+  retry = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(retry)}
+"""
+
+
+class RedisBucketStore:
+    """Token buckets shared by every worker through Redis."""
+
+    prefix = "selenly:ratelimit:"
+
+    def __init__(self):
+        self._script = None
+
+    async def take(self, key: str, rate: Rate) -> Tuple[bool, float]:
+        if self._script is None:
+            self._script = get_redis().register_script(_TAKE_SCRIPT)
+        allowed, retry = await self._script(keys=[self.prefix + key], args=[rate.capacity, rate.per_second])
+        return bool(int(allowed)), float(retry)
+
+
+def build_store():
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisBucketStore()
+    return MemoryBucketStore(settings.RATE_LIMIT_MAX_KEYS)
+
+
+def forwarded_client(raw_headers, trusted_hops: int) -> Optional[str]:
+    """The X-Forwarded-For entry ``trusted_hops`` from the right, or ``None``.
+
+    Entries to the left of the ones our proxies appended are client-supplied, so only the
+    rightmost hops can be trusted. Repeated headers are joined in order, as proxies do.
+    """
+    hops = [
+        hop.strip()
+        for name, value in raw_headers
+        if name == b"x-forwarded-for"
+        for hop in value.decode("latin-1").split(",")
+        if hop.strip()
+    ]
+    if trusted_hops < 1 or len(hops) < trusted_hops:
+        return None
+    return hops[-trusted_hops]
+
+
+def client_identity(scope) -> str:
+    """``user:<id>`` for requests with a valid access token, otherwise ``ip:<address>``.
+
+    The token is only verified, not looked up, so this costs no database round trip.
+    """
+    headers = dict(scope.get("headers") or [])
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    if authorization.lower().startswith("bearer "):
+        try:
+            payload = jwt.decode(authorization[7:], settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+            if payload.get("sub"):
+                return f"user:{payload['sub']}"
+        except JWTError:
+            pass
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = forwarded_client(scope.get("headers") or [], settings.RATE_LIMIT_TRUSTED_HOPS)
+        if forwarded:
+            return f"ip:{forwarded}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+async def _reject(send, status: int, detail: str, retry_after: float) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionControlMiddleware:
+    """Token-bucket rate limiting per route and client, plus a global concurrency cap.
+
+    Written as plain ASGI so the concurrency slot is held until the response body has been
+    sent, which matters for the streaming chat endpoint. Requests over a route's rate get
+    429; requests that cannot get a slot within ``ADMISSION_WAIT_SECONDS`` get 503. Both
+    carry ``Retry-After``. Store errors (e.g. Redis down) fail open.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.rules = {key: Rate.parse(spec) for key, spec in DEFAULT_RULES.items()}
+        self.rules.update(parse_rules(settings.RATE_LIMIT_RULES))
+        self.default_rate: Optional[Rate] = Rate.parse(settings.RATE_LIMIT_DEFAULT) if settings.RATE_LIMIT_DEFAULT else None
+        self.store = build_store()
+        self.max_concurrency = settings.MAX_CONCURRENT_REQUESTS
+        self._slots = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency > 0 else None
+
+    def rule_for(self, method: str, path: str) -> Tuple[str, Optional[Rate]]:
+        key = f"{method} {normalize_path(path)}"
+        # Routes without a rule still get a bucket of their own, at the default rate.
+        return key, self.rules.get(key, self.default_rate)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        if settings.RATE_LIMIT_ENABLED:
+            rule, rate = self.rule_for(scope["method"], scope["path"])
+            if rate is not None:
+                try:
+                    allowed, retry_after = await self.store.take(f"{rule}|{client_identity(scope)}", rate)
+                except Exception:
+                    counters["errors"] += 1
+                    logger.warning("rate limit store failed; allowing request", exc_info=True)
+                    allowed, retry_after = True, 0.0
+                if not allowed:
+                    counters["limited"] += 1
+                    await _reject(send, 429, "Too many requests", retry_after)
+                    return
+
+        if self._slots is None:
+            await self.app(scope, receive, send)
+            return
+        if self._slots.locked():
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=settings.ADMISSION_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                counters["shed"] += 1
+                await _reject(send, 503, "Server busy, please retry", settings.ADMISSION_RETRY_AFTER_SECONDS)
+                return
+        else:
+            await self._slots.acquire()
+        counters["in_flight"] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            counters["in_flight"] -= 1
+            self._slots.release()
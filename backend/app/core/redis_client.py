@@ -0,0 +1,29 @@
+from typing import Optional
+
+from app.core.config import settings
+
+_redis = None
+
+
+def get_redis():
+    """Return the process-wide ``redis.asyncio`` client, created on first use.
+
+    Redis is only needed when a cache or rate-limit backend is set to ``redis``, so the
+    import is deferred until then.
+    """
+    global _redis
+    if _redis is None:
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:
+            raise RuntimeError("The redis backend requires the 'redis' package") from exc
+        _redis = redis_asyncio.from_url(settings.REDIS_URL, decode_responses=True)
+    return _redis
+
+
+async def close_redis() -> None:
+    global _redis
+    client: Optional[object] = _redis
+    _redis = None
+    if client is not None:
+        await client.aclose()
@@ -1,11 +1,98 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 import secrets
+from typing import Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
 from jose import jwt
 from passlib.context import CryptContext
 
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger("selenly.auth")
+
+# Pinning min/max to the configured cost makes any hash with a different cost "need update",
+# so changing BCRYPT_ROUNDS transparently rehashes users on their next login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+_hash_executor: Optional[ProcessPoolExecutor] = None
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """Detached snapshot of the authenticated user, safe to cache across requests."""
+
+    id: int
+    email: str
+    is_active: bool
+    is_email_verified: bool
+    is_admin: bool
+    token_generation: int = 0
+
+    @classmethod
+    def from_user(cls, user) -> "CurrentUser":
+        return cls(
+            id=user.id,
+            email=user.email,
+            is_active=bool(user.is_active),
+            is_email_verified=bool(user.is_email_verified),
+            is_admin=bool(user.is_admin),
+            token_generation=user.token_generation or 0,
+        )
+
+
+user_cache = TTLCache(max_size=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+
+USER_VERSION_PREFIX = "selenly:user-version:"
+# Version keys only need to outlive the cache entries they validate.
+USER_VERSION_TTL_SECONDS = 30 * 24 * 3600
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop the user from this process's cache only; see ``publish_user_change``."""
+    user_cache.delete(int(user_id))
+
+
+async def user_version(user_id: int) -> Optional[str]:
+    """Cross-worker change counter for ``user_id`` with ``USER_CACHE_BACKEND=redis``, else ``None``.
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    Cached users are stored with the counter seen when they were loaded; a different value
+    means another process changed the user and the cache entry must be reloaded.
+    """
+    if settings.USER_CACHE_BACKEND != "redis":
+        return None
+    try:
+        return await get_redis().get(f"{USER_VERSION_PREFIX}{user_id}") or "0"
+    except Exception:
+        # Unknown version: callers treat it as a mismatch and read the database.
+        logger.warning("user version lookup failed", exc_info=True)
+        return "unavailable"
+
+
+async def publish_user_change(user_id: int) -> None:
+    """Invalidate ``user_id`` here and, with ``USER_CACHE_BACKEND=redis``, on every other worker."""
+    invalidate_user(user_id)
+    if settings.USER_CACHE_BACKEND != "redis":
+        return
+    key = f"{USER_VERSION_PREFIX}{user_id}"
+    try:
+        async with get_redis().pipeline(transaction=True) as pipe:
+            await pipe.incr(key).expire(key, USER_VERSION_TTL_SECONDS).execute()
+    except Exception:
+        logger.warning("publishing user change failed; other workers rely on the cache TTL", exc_info=True)
 
 
 def hash_password(password: str) -> str:
@@ -16,15 +103,57 @@ def verify_password(password: str, hashed_password: str) -> bool:
     return pwd_context.verify(password, hashed_password)
 
 
-def create_access_token(subject: str) -> str:
+def verify_and_update_password(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+def get_hash_executor() -> Optional[ProcessPoolExecutor]:
+    global _hash_executor
+    if _hash_executor is None and settings.PASSWORD_HASH_WORKERS > 0:
+        # spawn, not fork: the API process already runs an event loop and driver threads.
+        _hash_executor = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _hash_executor
+
+
+def shutdown_hash_executor() -> None:
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+
+async def _run_hashing(func, *args):
+    executor = get_hash_executor()
+    if executor is None:
+        return await run_in_threadpool(func, *args)
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hashing(hash_password, password)
+
+
+async def verify_and_update_password_async(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await _run_hashing(verify_and_update_password, password, hashed_password)
+
+
+def create_access_token(subject: str, generation: int = 0) -> str:
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode = {"sub": subject, "exp": expire, "type": "access"}
+    to_encode = {"sub": subject, "exp": expire, "type": "access", "gen": generation}
     return jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
 
-def create_refresh_token(subject: str) -> str:
+def create_refresh_token(subject: str, generation: int = 0) -> str:
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode = {"sub": subject, "exp": expire, "type": "refresh"}
+    # jti keeps tokens minted for the same user in the same second distinct.
+    to_encode = {"sub": subject, "exp": expire, "type": "refresh", "gen": generation, "jti": secrets.token_hex(16)}
     return jwt.encode(to_encode, settings.JWT_REFRESH_SECRET, algorithm=settings.JWT_ALGORITHM)
 
+def hash_token(token: str) -> str:
+    """Fixed-width digest stored and indexed in place of the refresh token itself."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
 def create_one_time_token() -> str:
     return secrets.token_urlsafe(32)
@@ -0,0 +1,35 @@
+from functools import lru_cache
+from typing import Tuple, Type
+
+from fastapi import Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+
+@lru_cache(maxsize=None)
+def out_columns(model, schema: Type[BaseModel]) -> Tuple:
+    """Mapped columns of ``model`` for every field of ``schema``, in field order.
+
+    ``select(*out_columns(Model, ModelOut))`` returns plain rows instead of ORM entities,
+    so list routes skip identity-map and change-tracking work for data they only read.
+    """
+    return tuple(getattr(model, name) for name in schema.model_fields)
+
+
+def default_response_class():
+    return ORJSONResponse if settings.ORJSON_RESPONSES else JSONResponse
+
+
+def rows_response(rows, response: Response):
+    """Return projected rows from a list route.
+
+    With ``ORJSON_RESPONSES`` the rows go straight to orjson, skipping the route's
+    ``response_model`` validation (the projection already has exactly its fields); headers
+    set on ``response`` (ETag, X-Next-Cursor) are carried over. Otherwise the rows are
+    returned for FastAPI to validate and encode as usual.
+    """
+    if not settings.ORJSON_RESPONSES:
+        return rows
+    return ORJSONResponse([row._asdict() for row in rows], headers=dict(response.headers))
@@ -1,16 +1,92 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL, connect_args=settings.SQLITE_CONNECT_ARGS)
+
+def is_memory_sqlite(url: str) -> bool:
+    database = url.split("://", 1)[-1].lstrip("/").split("?", 1)[0]
+    return not database or database == ":memory:" or "mode=memory" in url
+
+
+def engine_options(url: str) -> dict:
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if url.startswith("sqlite"):
+        # In-memory databases live in a single connection (StaticPool), so there is nothing to size.
+        if is_memory_sqlite(url):
+            return options
+        # aiosqlite defaults to NullPool for files, which opens a connection per checkout and
+        # would silently ignore the pool settings below. Pooled aiosqlite connections run on
+        # non-daemon threads, so processes must ``await async_engine.dispose()`` before exiting.
+        if "+aiosqlite" in url:
+            options["poolclass"] = AsyncAdaptedQueuePool
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    )
+    if settings.DB_STATEMENT_TIMEOUT_MS and url.startswith("postgres"):
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+# The sync engine backs Alembic and the maintenance scripts; request handlers use the async engine.
+engine = create_engine(
+    settings.DATABASE_URL,
+    **{"connect_args": settings.SQLITE_CONNECT_ARGS, **engine_options(settings.DATABASE_URL)},
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+async_engine = create_async_engine(settings.ASYNC_DATABASE_URL, **engine_options(settings.ASYNC_DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
+pool_counters = {"connects": 0, "checkouts": 0, "checkins": 0, "invalidated": 0}
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def _count(name):
+    def listener(*args):
+        pool_counters[name] += 1
+    return listener
+
+
+for _engine in (engine, async_engine.sync_engine):
+    if _engine.dialect.name == "sqlite":
+        event.listen(_engine, "connect", _set_sqlite_pragmas)
+
+event.listen(async_engine.sync_engine, "connect", _count("connects"))
+event.listen(async_engine.sync_engine, "checkout", _count("checkouts"))
+event.listen(async_engine.sync_engine, "checkin", _count("checkins"))
+event.listen(async_engine.sync_engine, "invalidate", _count("invalidated"))
+
+
+def pool_stats() -> dict:
+    pool = async_engine.sync_engine.pool
+    stats = dict(pool_counters)
+    for attr in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, attr):
+            stats[attr] = getattr(pool, attr)()
+    return stats
+
+
+def upsert_insert(dialect_name: str):
+    """Dialect ``insert()`` that supports ``on_conflict_do_update`` (Postgres or SQLite)."""
+    return pg_insert if dialect_name == "postgresql" else sqlite_insert
+
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -6,16 +6,35 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.core.jobs import job_queue
+from app.core import metrics, rate_limit
+from app.core.rate_limit import AdmissionControlMiddleware
+from app.core.redis_client import close_redis
+from app.core.security import shutdown_hash_executor
+from app.core.serialization import default_response_class
+from app.db import async_engine, pool_stats
+from app.services.ai import close_client
+from app.services.token_sweeper import start_periodic_sweeper, stop_periodic_sweeper
 from app.routers import auth, profiles, posts, moods, journals, ai, reports
 
-app = FastAPI(title="Selenly API", version="0.1.0")
+app = FastAPI(title="Selenly API", version="0.1.0", default_response_class=default_response_class())
+
+# Added before CORS so CORS wraps it and 429/503 responses still carry its headers. Later
+# registrations wrap earlier ones, so the request_logging middleware below is outermost.
+app.add_middleware(AdmissionControlMiddleware)
+
+if settings.METRICS_ENABLED:
+    # Outside admission control so rejected requests are counted too.
+    metrics.instrument_engine(async_engine.sync_engine)
+    app.add_middleware(metrics.MetricsMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS.split(","),
+    allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Retry-After"],
 )
 
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -28,6 +47,20 @@ app.include_router(reports.router, prefix="/reports", tags=["reports"])
 
 logger = logging.getLogger("selenly")
 
+@app.on_event("startup")
+async def startup():
+    await job_queue.start()
+    start_periodic_sweeper()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await stop_periodic_sweeper()
+    await job_queue.stop()
+    shutdown_hash_executor()
+    await close_client()
+    await close_redis()
+    await async_engine.dispose()
+
 @app.middleware("http")
 async def request_logging(request: Request, call_next):
     request_id = request.headers.get("x-request-id") or str(uuid.uuid4())
@@ -51,5 +84,9 @@ async def root():
 
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    return {"status": "ok", "db_pool": pool_stats(), "admission": rate_limit.counters, "caches": metrics.cache_stats()}
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        return metrics.metrics_response()
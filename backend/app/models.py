@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, Column, Date, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 from app.db import Base
@@ -13,6 +13,8 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     is_email_verified = Column(Boolean, default=False)
     is_admin = Column(Boolean, default=False)
+    # Bumped to revoke every outstanding session of the user at once.
+    token_generation = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     profile = relationship("Profile", back_populates="user", uselist=False)
@@ -50,6 +52,11 @@ class Post(Base):
 
     user = relationship("User", back_populates="posts")
 
+    __table_args__ = (
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        Index("ix_posts_category_created_at_id", "category", "created_at", "id"),
+    )
+
 class MoodEntry(Base):
     __tablename__ = "moods"
 
@@ -59,9 +66,31 @@ class MoodEntry(Base):
     energy = Column(String, nullable=True)
     note = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Offline sync: client-generated idempotency key and the user's resource version of the last write.
+    client_id = Column(String(64), nullable=True)
+    sync_version = Column(Integer, nullable=False, default=0)
 
     user = relationship("User", back_populates="moods")
 
+    __table_args__ = (
+        Index("ix_moods_user_id_created_at", "user_id", "created_at"),
+        Index("ix_moods_user_id_client_id", "user_id", "client_id", unique=True),
+        Index("ix_moods_user_id_sync_version_id", "user_id", "sync_version", "id"),
+    )
+
+class MoodDailyRollup(Base):
+    """Per-user, per-UTC-day count of each normalized mood and energy value.
+
+    Maintained incrementally alongside ``moods`` writes so ``/moods/stats`` reads O(days) rows.
+    """
+    __tablename__ = "mood_daily_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    dimension = Column(String(16), primary_key=True)
+    value = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
 class JournalEntry(Base):
     __tablename__ = "journals"
 
@@ -71,16 +100,25 @@ class JournalEntry(Base):
     body = Column(Text, nullable=False)
     gratitude = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Offline sync: client-generated idempotency key and the user's resource version of the last write.
+    client_id = Column(String(64), nullable=True)
+    sync_version = Column(Integer, nullable=False, default=0)
 
     user = relationship("User", back_populates="journals")
 
+    __table_args__ = (
+        Index("ix_journals_user_id_created_at", "user_id", "created_at"),
+        Index("ix_journals_user_id_client_id", "user_id", "client_id", unique=True),
+        Index("ix_journals_user_id_sync_version_id", "user_id", "sync_version", "id"),
+    )
+
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    token = Column(String, unique=True, index=True, nullable=False)
-    expires_at = Column(DateTime, nullable=False)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
     revoked = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -92,7 +130,7 @@ class EmailVerificationToken(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     token = Column(String, unique=True, index=True, nullable=False)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
     used = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -104,7 +142,7 @@ class PasswordResetToken(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     token = Column(String, unique=True, index=True, nullable=False)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
     used = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -122,3 +160,42 @@ class Report(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     reporter = relationship("User", back_populates="reports")
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    payload = Column(Text, nullable=False, default="{}")
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (Index("ix_jobs_status_run_at", "status", "run_at"),)
+
+class ResourceVersion(Base):
+    """Monotonic counter per cacheable scope (e.g. ``posts``, ``moods:42``), bumped in the same
+    transaction as every write to that scope and used to derive ETags."""
+    __tablename__ = "resource_versions"
+
+    scope = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class SyncTombstone(Base):
+    """Record of a deleted mood or journal entry, so delta sync can tell clients to drop it."""
+    __tablename__ = "sync_tombstones"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    resource = Column(String(16), nullable=False)
+    entry_id = Column(Integer, nullable=False)
+    client_id = Column(String(64), nullable=True)
+    sync_version = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_sync_tombstones_user_id_resource_sync_version_id", "user_id", "resource", "sync_version", "id"),
+    )
@@ -1,25 +1,49 @@
+import json
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from openai import OpenAIError
 
 from app.schemas import ChatRequest, ChatResponse
-from app.services.ai import detect_crisis, generate_response
+from app.services.ai import CRISIS_REPLY, detect_crisis, generate_response, stream_response
 
 router = APIRouter()
 
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 @router.post("/chat", response_model=ChatResponse)
-def chat(payload: ChatRequest):
+async def chat(payload: ChatRequest):
     if detect_crisis(payload.message):
-        return ChatResponse(
-            reply=(
-                "I'm really sorry you're going through this. You deserve support. "
-                "If you're in immediate danger, please contact local emergency services or a trusted person. "
-                "If you're able, consider reaching out to a crisis hotline in your area."
-            ),
-            flagged_crisis=True,
-        )
+        return ChatResponse(reply=CRISIS_REPLY, flagged_crisis=True)
 
     try:
-        response = generate_response(payload.message, payload.history)
-    except RuntimeError as exc:
+        response = await generate_response(payload.message, payload.history)
+    except (RuntimeError, OpenAIError) as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
     return ChatResponse(reply=response)
+
+@router.post("/chat/stream")
+async def chat_stream(payload: ChatRequest):
+    """Server-Sent Events variant of /chat: ``delta`` events carry text as it is generated,
+    followed by a single ``done`` (or ``error``) event."""
+    async def events():
+        if detect_crisis(payload.message):
+            yield sse_event("delta", {"text": CRISIS_REPLY})
+            yield sse_event("done", {"flagged_crisis": True})
+            return
+        try:
+            async for text in stream_response(payload.message, payload.history):
+                yield sse_event("delta", {"text": text})
+        except (RuntimeError, OpenAIError) as exc:
+            yield sse_event("error", {"detail": str(exc)})
+            return
+        yield sse_event("done", {"flagged_crisis": False})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -2,7 +2,8 @@ from datetime import datetime, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_db
 from app.models import EmailVerificationToken, PasswordResetToken, RefreshToken, User
@@ -17,86 +18,120 @@ from app.schemas import (
     UserOut,
 )
 from app.core.config import settings
+from app.services.notifications import queue_password_reset_email, queue_verification_email
 from app.core.security import (
+    CurrentUser,
     create_access_token,
     create_one_time_token,
     create_refresh_token,
-    hash_password,
-    verify_password,
+    hash_token,
+    hash_password_async,
+    publish_user_change,
+    verify_and_update_password_async,
 )
+from app.routers.dependencies import get_current_user
 
 router = APIRouter()
 
 @router.post("/signup", response_model=UserOut)
-def signup(payload: UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == payload.email).first()
+async def signup(payload: UserCreate, db: AsyncSession = Depends(get_db)):
+    existing = await db.scalar(select(User).where(User.email == payload.email))
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    user = User(email=payload.email, hashed_password=hash_password(payload.password))
+    user = User(email=payload.email, hashed_password=await hash_password_async(payload.password))
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 @router.post("/login", response_model=TokenPair)
-def login(payload: UserCreate, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not verify_password(payload.password, user.hashed_password):
+async def login(payload: UserCreate, db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(User).where(User.email == payload.email))
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    valid, new_hash = await verify_and_update_password_async(payload.password, user.hashed_password)
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if new_hash:
+        user.hashed_password = new_hash
 
-    access_token = create_access_token(str(user.id))
-    refresh_token = create_refresh_token(str(user.id))
+    access_token = create_access_token(str(user.id), user.token_generation)
+    refresh_token = create_refresh_token(str(user.id), user.token_generation)
 
     db_token = RefreshToken(
         user_id=user.id,
-        token=refresh_token,
+        token_hash=hash_token(refresh_token),
         expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
     )
     db.add(db_token)
-    db.commit()
+    await db.commit()
 
     return TokenPair(access_token=access_token, refresh_token=refresh_token)
 
 @router.post("/refresh", response_model=TokenPair)
-def refresh(payload: RefreshRequest, db: Session = Depends(get_db)):
+async def refresh(payload: RefreshRequest, db: AsyncSession = Depends(get_db)):
     try:
         decoded = jwt.decode(payload.refresh_token, settings.JWT_REFRESH_SECRET, algorithms=[settings.JWT_ALGORITHM])
         if decoded.get("type") != "refresh":
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
         user_id = decoded.get("sub")
-    except JWTError:
+        generation = int(decoded.get("gen", 0))
+    except (JWTError, TypeError, ValueError):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
 
-    db_token = db.query(RefreshToken).filter(RefreshToken.token == payload.refresh_token).first()
-    if not db_token or db_token.revoked or db_token.expires_at < datetime.utcnow():
+    row = (
+        await db.execute(
+            select(RefreshToken, User.token_generation)
+            .join(User, User.id == RefreshToken.user_id)
+            .where(RefreshToken.token_hash == hash_token(payload.refresh_token))
+        )
+    ).first()
+    if not row or row[0].revoked or row[0].expires_at < datetime.utcnow():
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token expired")
+    db_token, current_generation = row
+    if generation != current_generation:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Session revoked")
 
-    new_access = create_access_token(str(user_id))
-    new_refresh = create_refresh_token(str(user_id))
+    new_access = create_access_token(str(user_id), current_generation)
+    new_refresh = create_refresh_token(str(user_id), current_generation)
 
     db_token.revoked = True
     rotated = RefreshToken(
         user_id=int(user_id),
-        token=new_refresh,
+        token_hash=hash_token(new_refresh),
         expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
     )
     db.add(rotated)
-    db.commit()
+    await db.commit()
 
     return TokenPair(access_token=new_access, refresh_token=new_refresh)
 
 @router.post("/logout")
-def logout(payload: RefreshRequest, db: Session = Depends(get_db)):
-    db_token = db.query(RefreshToken).filter(RefreshToken.token == payload.refresh_token).first()
-    if db_token:
-        db_token.revoked = True
-        db.commit()
+async def logout(payload: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.token_hash == hash_token(payload.refresh_token))
+        .values(revoked=True)
+    )
+    await db.commit()
+    return {"status": "ok"}
+
+@router.post("/logout-all")
+async def logout_all(current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """Revoke every refresh and access token issued to the caller with a single UPDATE."""
+    await db.execute(
+        update(User)
+        .where(User.id == current_user.id)
+        .values(token_generation=User.token_generation + 1)
+    )
+    await db.commit()
+    await publish_user_change(current_user.id)
     return {"status": "ok"}
 
 @router.post("/request-password-reset")
-def request_password_reset(payload: PasswordResetRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email).first()
+async def request_password_reset(payload: PasswordResetRequest, db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(User).where(User.email == payload.email))
     if not user:
         return {"status": "ok"}
 
@@ -107,28 +142,25 @@ def request_password_reset(payload: PasswordResetRequest, db: Session = Depends(
         expires_at=datetime.utcnow() + timedelta(hours=1),
     )
     db.add(db_token)
-    db.commit()
+    await db.commit()
+    await queue_password_reset_email(user.email, token)
     return {"status": "ok", "token": token}
 
 @router.post("/reset-password")
-def reset_password(payload: PasswordResetConfirm, db: Session = Depends(get_db)):
-    db_token = (
-        db.query(PasswordResetToken)
-        .filter(PasswordResetToken.token == payload.token)
-        .first()
-    )
+async def reset_password(payload: PasswordResetConfirm, db: AsyncSession = Depends(get_db)):
+    db_token = await db.scalar(select(PasswordResetToken).where(PasswordResetToken.token == payload.token))
     if not db_token or db_token.used or db_token.expires_at < datetime.utcnow():
         raise HTTPException(status_code=400, detail="Token invalid or expired")
 
-    user = db.query(User).filter(User.id == db_token.user_id).first()
-    user.hashed_password = hash_password(payload.new_password)
+    user = await db.get(User, db_token.user_id)
+    user.hashed_password = await hash_password_async(payload.new_password)
     db_token.used = True
-    db.commit()
+    await db.commit()
     return {"status": "ok"}
 
 @router.post("/request-verification")
-def request_verification(payload: EmailVerificationRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email).first()
+async def request_verification(payload: EmailVerificationRequest, db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(User).where(User.email == payload.email))
     if not user:
         return {"status": "ok"}
 
@@ -139,21 +171,19 @@ def request_verification(payload: EmailVerificationRequest, db: Session = Depend
         expires_at=datetime.utcnow() + timedelta(hours=24),
     )
     db.add(db_token)
-    db.commit()
+    await db.commit()
+    await queue_verification_email(user.email, token)
     return {"status": "ok", "token": token}
 
 @router.post("/verify-email")
-def verify_email(payload: EmailVerificationConfirm, db: Session = Depends(get_db)):
-    db_token = (
-        db.query(EmailVerificationToken)
-        .filter(EmailVerificationToken.token == payload.token)
-        .first()
-    )
+async def verify_email(payload: EmailVerificationConfirm, db: AsyncSession = Depends(get_db)):
+    db_token = await db.scalar(select(EmailVerificationToken).where(EmailVerificationToken.token == payload.token))
     if not db_token or db_token.used or db_token.expires_at < datetime.utcnow():
         raise HTTPException(status_code=400, detail="Token invalid or expired")
 
-    user = db.query(User).filter(User.id == db_token.user_id).first()
+    user = await db.get(User, db_token.user_id)
     user.is_email_verified = True
     db_token.used = True
-    db.commit()
+    await db.commit()
+    await publish_user_change(user.id)
     return {"status": "ok"}
@@ -1,28 +1,48 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.core.security import CurrentUser, user_cache, user_version
 from app.db import get_db
 from app.models import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> CurrentUser:
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        user_id = payload.get("sub")
-    except JWTError:
+        user_id = int(payload.get("sub"))
+        generation = int(payload.get("gen", 0))
+    except (JWTError, TypeError, ValueError):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    user = db.query(User).filter(User.id == int(user_id)).first() if user_id else None
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+    # Read before the user row, so a change published in between forces another reload.
+    version = await user_version(user_id)
+    current_user = None
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        current_user, cached_version = cached
+        # Generations only grow: a newer one in the token means this entry predates a
+        # logout-all served elsewhere, so reload instead of rejecting the fresh session.
+        if cached_version != version or generation > current_user.token_generation:
+            current_user = None
+    if current_user is None:
+        user = await db.scalar(select(User).where(User.id == user_id))
+        if not user:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        current_user = CurrentUser.from_user(user)
+        user_cache.set(user_id, (current_user, version))
+    if generation != current_user.token_generation:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Session revoked")
+    if not current_user.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account disabled")
+    return current_user
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+async def require_admin(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     if not current_user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
     return current_user
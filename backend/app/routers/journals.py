@@ -1,28 +1,103 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
 
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.http_cache import bump_version, conditional_get, user_scope
+from app.core.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_offset_cursor,
+    finalize_offset_page,
+    finalize_page,
+    keyset_paginate,
+    naive_utc,
+)
+from app.core.security import CurrentUser
+from app.core.serialization import out_columns, rows_response
 from app.db import get_db
-from app.models import JournalEntry, User
-from app.schemas import JournalCreate, JournalOut, JournalUpdate
+from app.models import JournalEntry
+from app.schemas import JournalBatch, JournalBatchResult, JournalChanges, JournalCreate, JournalOut, JournalSearchResult, JournalUpdate
+from app.services import search
+from app.services.sync import apply_batch, changes_since, record_tombstone
 from app.routers.dependencies import get_current_user
 
 router = APIRouter()
 
 @router.get("/", response_model=list[JournalOut])
-def list_journals(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return db.query(JournalEntry).filter(JournalEntry.user_id == current_user.id).order_by(JournalEntry.created_at.desc()).all()
+async def list_journals(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    not_modified = await conditional_get(request, response, db, user_scope("journals", current_user.id))
+    if not_modified:
+        return not_modified
+    query = select(*out_columns(JournalEntry, JournalOut)).where(JournalEntry.user_id == current_user.id)
+    if since:
+        query = query.where(JournalEntry.created_at >= naive_utc(since))
+    if until:
+        query = query.where(JournalEntry.created_at < naive_utc(until))
+    rows = (await db.execute(keyset_paginate(query, JournalEntry, cursor, limit))).all()
+    return rows_response(finalize_page(rows, limit, response), response)
+
+@router.get("/search", response_model=list[JournalSearchResult])
+async def search_journals(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    offset = decode_offset_cursor(cursor)
+    hits = await search.search_journals(db, current_user.id, q, limit + 1, offset)
+    ids = [hit[0] for hit in hits]
+    rows = {row.id: row for row in await db.execute(select(*out_columns(JournalEntry, JournalOut)).where(JournalEntry.id.in_(ids)))}
+    results = [
+        {**rows[row_id]._asdict(), "rank": rank, "snippet": snippet}
+        for row_id, rank, snippet in hits
+        if row_id in rows
+    ]
+    return finalize_offset_page(results, limit, offset, response)
+
+@router.post("/batch", response_model=JournalBatchResult)
+async def batch_journals(payload: JournalBatch, current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    if len(payload.create) + len(payload.update) + len(payload.delete) > settings.SYNC_MAX_BATCH_SIZE:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Batch too large")
+    result = await apply_batch(db, JournalEntry, "journals", current_user.id, payload)
+    await db.commit()
+    return result
+
+@router.get("/changes", response_model=JournalChanges)
+async def journals_changes(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=settings.SYNC_MAX_BATCH_SIZE),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    return await changes_since(db, JournalEntry, "journals", current_user.id, cursor, limit)
 
 @router.post("/", response_model=JournalOut)
-def create_journal(payload: JournalCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    journal = JournalEntry(user_id=current_user.id, **payload.dict())
+async def create_journal(payload: JournalCreate, current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    version = await bump_version(db, user_scope("journals", current_user.id))
+    journal = JournalEntry(user_id=current_user.id, sync_version=version, **payload.dict())
     db.add(journal)
-    db.commit()
-    db.refresh(journal)
+    await db.commit()
+    await db.refresh(journal)
     return journal
 
 @router.put("/{journal_id}", response_model=JournalOut)
-def update_journal(journal_id: int, payload: JournalUpdate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    journal = db.query(JournalEntry).filter(JournalEntry.id == journal_id).first()
+async def update_journal(journal_id: int, payload: JournalUpdate, current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    journal = await db.get(JournalEntry, journal_id)
     if not journal:
         raise HTTPException(status_code=404, detail="Journal entry not found")
     if journal.user_id != current_user.id:
@@ -30,17 +105,19 @@ def update_journal(journal_id: int, payload: JournalUpdate, current_user: User =
 
     for field, value in payload.dict(exclude_unset=True).items():
         setattr(journal, field, value)
-    db.commit()
-    db.refresh(journal)
+    journal.sync_version = await bump_version(db, user_scope("journals", current_user.id))
+    await db.commit()
+    await db.refresh(journal)
     return journal
 
 @router.delete("/{journal_id}")
-def delete_journal(journal_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    journal = db.query(JournalEntry).filter(JournalEntry.id == journal_id).first()
+async def delete_journal(journal_id: int, current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    journal = await db.get(JournalEntry, journal_id)
     if not journal:
         raise HTTPException(status_code=404, detail="Journal entry not found")
     if journal.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
-    db.delete(journal)
-    db.commit()
+    await db.delete(journal)
+    record_tombstone(db, "journals", journal, await bump_version(db, user_scope("journals", current_user.id)))
+    await db.commit()
     return {"status": "ok"}
@@ -1,46 +1,111 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional
 
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.http_cache import bump_version, conditional_get, user_scope
+from app.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, finalize_page, keyset_paginate, naive_utc
+from app.core.security import CurrentUser
+from app.core.serialization import out_columns, rows_response
 from app.db import get_db
-from app.models import MoodEntry, User
-from app.schemas import MoodCreate, MoodOut, MoodUpdate
+from app.models import MoodEntry
+from app.schemas import MoodBatch, MoodBatchResult, MoodChanges, MoodCreate, MoodOut, MoodStats, MoodUpdate
+from app.services.mood_stats import apply_rollup_deltas, entry_deltas, mood_deltas, mood_stats
+from app.services.sync import apply_batch, changes_since, record_tombstone
 from app.routers.dependencies import get_current_user
 
 router = APIRouter()
 
 @router.get("/", response_model=list[MoodOut])
-def list_moods(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    return db.query(MoodEntry).filter(MoodEntry.user_id == current_user.id).order_by(MoodEntry.created_at.desc()).all()
+async def list_moods(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    not_modified = await conditional_get(request, response, db, user_scope("moods", current_user.id))
+    if not_modified:
+        return not_modified
+    query = select(*out_columns(MoodEntry, MoodOut)).where(MoodEntry.user_id == current_user.id)
+    if since:
+        query = query.where(MoodEntry.created_at >= naive_utc(since))
+    if until:
+        query = query.where(MoodEntry.created_at < naive_utc(until))
+    rows = (await db.execute(keyset_paginate(query, MoodEntry, cursor, limit))).all()
+    return rows_response(finalize_page(rows, limit, response), response)
+
+@router.get("/stats", response_model=MoodStats)
+async def get_mood_stats(
+    days: int = Query(30, ge=1, le=366),
+    period: str = Query("day", pattern="^(day|week)$"),
+    window: int = Query(7, ge=1, le=52),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    return await mood_stats(db, current_user.id, days, period, window, datetime.utcnow().date())
+
+@router.post("/batch", response_model=MoodBatchResult)
+async def batch_moods(payload: MoodBatch, current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    if len(payload.create) + len(payload.update) + len(payload.delete) > settings.SYNC_MAX_BATCH_SIZE:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Batch too large")
+    result = await apply_batch(db, MoodEntry, "moods", current_user.id, payload, rollup=entry_deltas)
+    await db.commit()
+    return result
+
+@router.get("/changes", response_model=MoodChanges)
+async def moods_changes(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=settings.SYNC_MAX_BATCH_SIZE),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    return await changes_since(db, MoodEntry, "moods", current_user.id, cursor, limit)
 
 @router.post("/", response_model=MoodOut)
-def create_mood(payload: MoodCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    mood = MoodEntry(user_id=current_user.id, **payload.dict())
+async def create_mood(payload: MoodCreate, current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    version = await bump_version(db, user_scope("moods", current_user.id))
+    mood = MoodEntry(user_id=current_user.id, sync_version=version, **payload.dict())
     db.add(mood)
-    db.commit()
-    db.refresh(mood)
+    await db.flush()
+    await apply_rollup_deltas(db, current_user.id, mood_deltas(mood.created_at, mood.mood, mood.energy))
+    await db.commit()
+    await db.refresh(mood)
     return mood
 
 @router.put("/{mood_id}", response_model=MoodOut)
-def update_mood(mood_id: int, payload: MoodUpdate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    mood = db.query(MoodEntry).filter(MoodEntry.id == mood_id).first()
+async def update_mood(mood_id: int, payload: MoodUpdate, current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    mood = await db.get(MoodEntry, mood_id)
     if not mood:
         raise HTTPException(status_code=404, detail="Mood entry not found")
     if mood.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
 
+    deltas = mood_deltas(mood.created_at, mood.mood, mood.energy, sign=-1)
     for field, value in payload.dict(exclude_unset=True).items():
         setattr(mood, field, value)
-    db.commit()
-    db.refresh(mood)
+    mood.sync_version = await bump_version(db, user_scope("moods", current_user.id))
+    deltas.update(mood_deltas(mood.created_at, mood.mood, mood.energy))
+    await apply_rollup_deltas(db, current_user.id, deltas)
+    await db.commit()
+    await db.refresh(mood)
     return mood
 
 @router.delete("/{mood_id}")
-def delete_mood(mood_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    mood = db.query(MoodEntry).filter(MoodEntry.id == mood_id).first()
+async def delete_mood(mood_id: int, current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    mood = await db.get(MoodEntry, mood_id)
     if not mood:
         raise HTTPException(status_code=404, detail="Mood entry not found")
     if mood.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
-    db.delete(mood)
-    db.commit()
+    await db.delete(mood)
+    await apply_rollup_deltas(db, current_user.id, mood_deltas(mood.created_at, mood.mood, mood.energy, sign=-1))
+    record_tombstone(db, "moods", mood, await bump_version(db, user_scope("moods", current_user.id)))
+    await db.commit()
     return {"status": "ok"}
@@ -1,28 +1,109 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import Optional
 
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import Text, case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.http_cache import POSTS_SCOPE, bump_version, conditional_get, get_version
+from app.core.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    decode_offset_cursor,
+    finalize_offset_page,
+    finalize_page,
+    keyset_paginate,
+    split_page,
+)
+from app.core.security import CurrentUser
+from app.core.serialization import out_columns, rows_response
 from app.db import get_db
-from app.models import Post, User
-from app.schemas import PostCreate, PostOut, PostUpdate
+from app.models import Post
+from app.schemas import PostCreate, PostOut, PostSearchResult, PostUpdate
+from app.services import search
+from app.services.feed_cache import feed_cache, serialize_posts
 from app.routers.dependencies import get_current_user
 
 router = APIRouter()
 
+
+def feed_columns(excerpt: Optional[int]) -> list:
+    """``PostOut`` columns; with ``excerpt`` the body is cut to that many characters in SQL,
+    so full bodies never leave the database for feed previews."""
+    columns = list(out_columns(Post, PostOut))
+    if not excerpt:
+        return columns
+    preview = case(
+        (func.length(Post.body) > excerpt, func.substr(Post.body, 1, excerpt, type_=Text) + "…"),
+        else_=Post.body,
+    ).label("body")
+    return [preview if column.key == "body" else column for column in columns]
+
 @router.get("/", response_model=list[PostOut])
-def list_posts(db: Session = Depends(get_db)):
-    return db.query(Post).order_by(Post.created_at.desc()).all()
+async def list_posts(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    category: Optional[str] = None,
+    excerpt: Optional[int] = Query(None, ge=20, le=5000, description="Truncate each body to this many characters"),
+    db: AsyncSession = Depends(get_db),
+):
+    version = await get_version(db, POSTS_SCOPE)
+    not_modified = await conditional_get(request, response, db, POSTS_SCOPE, private=False, version=version)
+    if not_modified:
+        return not_modified
+    query = select(*feed_columns(excerpt))
+    if category:
+        query = query.where(Post.category == category)
+
+    if cursor is None and feed_cache is not None:
+        async def build():
+            page, next_cursor = split_page((await db.execute(keyset_paginate(query, Post, None, limit))).all(), limit)
+            return serialize_posts(page), next_cursor
+
+        body, next_cursor = await feed_cache.get_or_build(feed_cache.key(version, category, limit, excerpt), build)
+        headers = dict(response.headers)
+        if next_cursor:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    rows = (await db.execute(keyset_paginate(query, Post, cursor, limit))).all()
+    return rows_response(finalize_page(rows, limit, response), response)
+
+@router.get("/search", response_model=list[PostSearchResult])
+async def search_posts(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+):
+    offset = decode_offset_cursor(cursor)
+    hits = await search.search_posts(db, q, limit + 1, offset)
+    ids = [hit[0] for hit in hits]
+    rows = {row.id: row for row in await db.execute(select(*out_columns(Post, PostOut)).where(Post.id.in_(ids)))}
+    results = [
+        {**rows[row_id]._asdict(), "rank": rank, "snippet": snippet}
+        for row_id, rank, snippet in hits
+        if row_id in rows
+    ]
+    return finalize_offset_page(results, limit, offset, response)
 
 @router.post("/", response_model=PostOut)
-def create_post(payload: PostCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def create_post(payload: PostCreate, current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     post = Post(user_id=current_user.id, **payload.dict())
     db.add(post)
-    db.commit()
-    db.refresh(post)
+    await bump_version(db, POSTS_SCOPE)
+    await db.commit()
+    if feed_cache is not None:
+        await feed_cache.invalidate()
+    await db.refresh(post)
     return post
 
 @router.put("/{post_id}", response_model=PostOut)
-def update_post(post_id: int, payload: PostUpdate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    post = db.query(Post).filter(Post.id == post_id).first()
+async def update_post(post_id: int, payload: PostUpdate, current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    post = await db.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     if post.user_id != current_user.id:
@@ -30,17 +111,23 @@ def update_post(post_id: int, payload: PostUpdate, current_user: User = Depends(
 
     for field, value in payload.dict(exclude_unset=True).items():
         setattr(post, field, value)
-    db.commit()
-    db.refresh(post)
+    await bump_version(db, POSTS_SCOPE)
+    await db.commit()
+    if feed_cache is not None:
+        await feed_cache.invalidate()
+    await db.refresh(post)
     return post
 
 @router.delete("/{post_id}")
-def delete_post(post_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    post = db.query(Post).filter(Post.id == post_id).first()
+async def delete_post(post_id: int, current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    post = await db.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     if post.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
-    db.delete(post)
-    db.commit()
+    await db.delete(post)
+    await bump_version(db, POSTS_SCOPE)
+    await db.commit()
+    if feed_cache is not None:
+        await feed_cache.invalidate()
     return {"status": "ok"}
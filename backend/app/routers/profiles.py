@@ -1,29 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.http_cache import bump_version, conditional_get, user_scope
+from app.core.security import CurrentUser
 from app.db import get_db
-from app.models import Profile, User
+from app.models import Profile
 from app.schemas import ProfileCreate, ProfileOut
 from app.routers.dependencies import get_current_user
 
 router = APIRouter()
 
 @router.get("/me", response_model=ProfileOut)
-def get_profile(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    profile = db.query(Profile).filter(Profile.user_id == current_user.id).first()
+async def get_profile(
+    request: Request,
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    not_modified = await conditional_get(request, response, db, user_scope("profile", current_user.id))
+    if not_modified:
+        return not_modified
+    profile = await db.scalar(select(Profile).where(Profile.user_id == current_user.id))
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     return profile
 
 @router.put("/me", response_model=ProfileOut)
-def upsert_profile(payload: ProfileCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    profile = db.query(Profile).filter(Profile.user_id == current_user.id).first()
+async def upsert_profile(payload: ProfileCreate, current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    profile = await db.scalar(select(Profile).where(Profile.user_id == current_user.id))
     if profile:
         for field, value in payload.dict().items():
             setattr(profile, field, value)
     else:
         profile = Profile(user_id=current_user.id, **payload.dict())
         db.add(profile)
-    db.commit()
-    db.refresh(profile)
+    await bump_version(db, user_scope("profile", current_user.id))
+    await db.commit()
+    await db.refresh(profile)
     return profile
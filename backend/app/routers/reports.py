@@ -1,17 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.security import CurrentUser
+from app.core.serialization import out_columns, rows_response
 from app.db import get_db
-from app.models import Post, Report, User
+from app.models import Post, Report
 from app.schemas import ReportCreate, ReportOut
 from app.routers.dependencies import get_current_user, require_admin
 
 router = APIRouter()
 
 @router.post("/", response_model=ReportOut)
-def create_report(payload: ReportCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def create_report(payload: ReportCreate, current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     if payload.post_id:
-        post = db.query(Post).filter(Post.id == payload.post_id).first()
+        post = await db.get(Post, payload.post_id)
         if not post:
             raise HTTPException(status_code=404, detail="Post not found")
 
@@ -22,20 +25,21 @@ def create_report(payload: ReportCreate, current_user: User = Depends(get_curren
         details=payload.details,
     )
     db.add(report)
-    db.commit()
-    db.refresh(report)
+    await db.commit()
+    await db.refresh(report)
     return report
 
 @router.get("/", response_model=list[ReportOut])
-def list_reports(db: Session = Depends(get_db), admin: User = Depends(require_admin)):
-    return db.query(Report).order_by(Report.created_at.desc()).all()
+async def list_reports(response: Response, db: AsyncSession = Depends(get_db), admin: CurrentUser = Depends(require_admin)):
+    rows = (await db.execute(select(*out_columns(Report, ReportOut)).order_by(Report.created_at.desc()))).all()
+    return rows_response(rows, response)
 
 @router.put("/{report_id}/status", response_model=ReportOut)
-def update_report_status(report_id: int, status: str, db: Session = Depends(get_db), admin: User = Depends(require_admin)):
-    report = db.query(Report).filter(Report.id == report_id).first()
+async def update_report_status(report_id: int, status: str, db: AsyncSession = Depends(get_db), admin: CurrentUser = Depends(require_admin)):
+    report = await db.get(Report, report_id)
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     report.status = status
-    db.commit()
-    db.refresh(report)
+    await db.commit()
+    await db.refresh(report)
     return report
@@ -1,6 +1,6 @@
-from datetime import datetime
-from typing import List, Optional
-from pydantic import BaseModel, EmailStr
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from pydantic import BaseModel, EmailStr, Field
 
 class Token(BaseModel):
     access_token: str
@@ -79,6 +79,20 @@ class PostOut(PostBase):
     class Config:
         from_attributes = True
 
+class PostSearchResult(PostOut):
+    rank: float
+    snippet: str
+
+class EntryRef(BaseModel):
+    """Identifies an entry by server ``id`` or by the ``client_id`` it was created with."""
+    id: Optional[int] = None
+    client_id: Optional[str] = Field(default=None, max_length=64)
+
+class Tombstone(BaseModel):
+    id: int
+    client_id: Optional[str] = None
+    deleted_at: datetime
+
 class MoodCreate(BaseModel):
     mood: str
     energy: Optional[str] = None
@@ -88,6 +102,7 @@ class MoodOut(MoodCreate):
     id: int
     user_id: int
     created_at: datetime
+    client_id: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -97,6 +112,47 @@ class MoodUpdate(BaseModel):
     energy: Optional[str] = None
     note: Optional[str] = None
 
+class MoodBatchCreate(MoodCreate):
+    client_id: str = Field(min_length=1, max_length=64)
+    created_at: Optional[datetime] = None
+
+class MoodBatchUpdate(MoodUpdate, EntryRef):
+    pass
+
+class MoodBatch(BaseModel):
+    create: List[MoodBatchCreate] = []
+    update: List[MoodBatchUpdate] = []
+    delete: List[EntryRef] = []
+
+class MoodBatchResult(BaseModel):
+    created: List[MoodOut]
+    updated: List[MoodOut]
+    deleted: List[int]
+    not_found: List[EntryRef]
+
+class MoodChanges(BaseModel):
+    changes: List[MoodOut]
+    deleted: List[Tombstone]
+    cursor: str
+    has_more: bool
+
+class MoodPeriodStats(BaseModel):
+    start: date
+    entries: int
+    moods: Dict[str, int]
+    energy: Dict[str, int]
+    energy_score: Optional[float] = None
+    energy_moving_average: Optional[float] = None
+
+class MoodStats(BaseModel):
+    start: date
+    end: date
+    period: str
+    periods: List[MoodPeriodStats]
+    totals: Dict[str, int]
+    current_streak: int
+    longest_streak: int
+
 class JournalCreate(BaseModel):
     title: Optional[str] = None
     body: str
@@ -106,15 +162,44 @@ class JournalOut(JournalCreate):
     id: int
     user_id: int
     created_at: datetime
+    client_id: Optional[str] = None
 
     class Config:
         from_attributes = True
 
+class JournalSearchResult(JournalOut):
+    rank: float
+    snippet: str
+
 class JournalUpdate(BaseModel):
     title: Optional[str] = None
     body: Optional[str] = None
     gratitude: Optional[str] = None
 
+class JournalBatchCreate(JournalCreate):
+    client_id: str = Field(min_length=1, max_length=64)
+    created_at: Optional[datetime] = None
+
+class JournalBatchUpdate(JournalUpdate, EntryRef):
+    pass
+
+class JournalBatch(BaseModel):
+    create: List[JournalBatchCreate] = []
+    update: List[JournalBatchUpdate] = []
+    delete: List[EntryRef] = []
+
+class JournalBatchResult(BaseModel):
+    created: List[JournalOut]
+    updated: List[JournalOut]
+    deleted: List[int]
+    not_found: List[EntryRef]
+
+class JournalChanges(BaseModel):
+    changes: List[JournalOut]
+    deleted: List[Tombstone]
+    cursor: str
+    has_more: bool
+
 class ReportCreate(BaseModel):
     post_id: Optional[int] = None
     reason: str
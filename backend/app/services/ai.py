@@ -1,8 +1,19 @@
-from typing import Optional
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional, Tuple
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.metrics import openai_call, record_openai_usage
+from app.services.crisis import detect_crisis
+from app.services.response_cache import normalize_message, response_cache, unit_vector
+
+logger = logging.getLogger("selenly.ai")
 
 SYSTEM_PROMPT = (
     "You are Selenly, a supportive mental health companion. "
@@ -12,36 +23,149 @@ SYSTEM_PROMPT = (
     "encourage them to reach out to local emergency services or a trusted person."
 )
 
-CRISIS_KEYWORDS = {
-    "suicide",
-    "kill myself",
-    "end my life",
-    "self harm",
-    "self-harm",
-    "hurt myself",
-    "want to die",
-    "overdose",
-    "no reason to live",
-}
+CRISIS_REPLY = (
+    "I'm really sorry you're going through this. You deserve support. "
+    "If you're in immediate danger, please contact local emergency services or a trusted person. "
+    "If you're able, consider reaching out to a crisis hotline in your area."
+)
+
+FALLBACK_REPLY = "I'm here with you. Would you like to share more about what's going on?"
+
+SUMMARY_PROMPT = (
+    "Summarize the earlier part of this supportive conversation in a few sentences. "
+    "Keep the feelings, situations and coping ideas the user mentioned; omit pleasantries."
+)
+
+# Per-message framing cost (role, separators) on top of the content tokens.
+MESSAGE_TOKEN_OVERHEAD = 4
+
+_summary_cache = TTLCache(max_size=2048, ttl=60 * 60)
+
 
+def count_tokens(text: str) -> int:
+    # ~4 characters per token for English; deliberately avoids a tokenizer download at runtime.
+    return (len(text) + 3) // 4 + MESSAGE_TOKEN_OVERHEAD
 
-def detect_crisis(text: str) -> bool:
-    lowered = text.lower()
-    return any(keyword in lowered for keyword in CRISIS_KEYWORDS)
 
+def trim_history(history, budget: int) -> Tuple[list, list]:
+    """Split ``history`` into (dropped, kept) so the kept, most recent turns fit ``budget`` tokens."""
+    used = 0
+    start = len(history)
+    for index in range(len(history) - 1, -1, -1):
+        used += count_tokens(history[index].content)
+        if used > budget:
+            break
+        start = index
+    return list(history[:start]), list(history[start:])
 
-def build_prompt(history, message: str):
+
+def build_prompt(history, message: str, summary: Optional[str] = None):
     messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    if summary:
+        messages.append({"role": "system", "content": f"Summary of the earlier conversation: {summary}"})
     for item in history:
         messages.append({"role": item.role, "content": item.content})
     messages.append({"role": "user", "content": message})
     return messages
 
 
-def get_client():
+_client: Optional[AsyncOpenAI] = None
+# Caps in-flight upstream calls per process; excess requests wait here instead of piling onto the API.
+_upstream_slots = asyncio.Semaphore(settings.OPENAI_MAX_CONCURRENCY)
+
+
+def get_client() -> AsyncOpenAI:
+    global _client
     if not settings.OPENAI_API_KEY:
         raise RuntimeError("OPENAI_API_KEY is not set")
-    return OpenAI(api_key=settings.OPENAI_API_KEY)
+    if _client is None:
+        _client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.OPENAI_BASE_URL,
+            timeout=settings.OPENAI_TIMEOUT_SECONDS,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=settings.OPENAI_MAX_CONCURRENCY,
+                    max_keepalive_connections=settings.OPENAI_MAX_CONCURRENCY,
+                ),
+            ),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def summary_cache_stats() -> dict:
+    return _summary_cache.stats()
+
+
+def _prefix_digests(turns) -> List[str]:
+    digests = []
+    digest = ""
+    for item in turns:
+        digest = hashlib.sha256(f"{digest}\x00{item.role}\x00{item.content}".encode()).hexdigest()
+        digests.append(digest)
+    return digests
+
+
+async def summarize_turns(turns) -> Optional[str]:
+    """Return a summary of ``turns``, extending the longest already-summarized prefix.
+
+    Conversations only grow at the end, so each request usually adds one or two turns
+    to a prefix summarized on the previous request and the model sees only those.
+    """
+    if not turns:
+        return None
+    digests = _prefix_digests(turns)
+    cached = _summary_cache.get(digests[-1])
+    if cached is not None:
+        return cached
+
+    previous, start = None, 0
+    for index in range(len(digests) - 2, -1, -1):
+        previous = _summary_cache.get(digests[index])
+        if previous is not None:
+            start = index + 1
+            break
+
+    transcript = "\n".join(f"{item.role}: {item.content}" for item in turns[start:])
+    if previous:
+        transcript = f"Summary so far: {previous}\n{transcript}"
+
+    try:
+        async with _upstream_slots:
+            with openai_call("summary"):
+                response = await get_client().responses.create(
+                    model=settings.OPENAI_MODEL,
+                    input=[
+                        {"role": "system", "content": SUMMARY_PROMPT},
+                        {"role": "user", "content": transcript},
+                    ],
+                    temperature=0.2,
+                    max_output_tokens=settings.CHAT_SUMMARY_MAX_TOKENS,
+                )
+        record_openai_usage("summary", getattr(response, "usage", None))
+    except Exception:
+        logger.warning("history summary failed; falling back to the trimmed window", exc_info=True)
+        return previous
+
+    summary = getattr(response, "output_text", None)
+    if not summary:
+        return previous
+    _summary_cache.set(digests[-1], summary)
+    return summary
+
+
+async def prepare_prompt(history, message: str):
+    dropped, kept = trim_history(history, settings.CHAT_HISTORY_TOKEN_BUDGET)
+    summary = await summarize_turns(dropped) if settings.CHAT_HISTORY_SUMMARY else None
+    return build_prompt(kept, message, summary)
 
 
 def extract_response_text(response) -> str:
@@ -56,17 +180,98 @@ def extract_response_text(response) -> str:
                         parts.append(content.text)
         if parts:
             return "\n".join(parts)
-    return "I'm here with you. Would you like to share more about what's going on?"
+    return FALLBACK_REPLY
+
+
+@dataclass
+class CacheLookup:
+    key: Optional[str] = None
+    vector: Optional[List[float]] = None
+    reply: Optional[str] = None
+
+
+async def embed(text: str) -> Optional[List[float]]:
+    try:
+        async with _upstream_slots:
+            with openai_call("embedding"):
+                result = await get_client().embeddings.create(
+                    model=settings.OPENAI_EMBEDDING_MODEL,
+                    input=normalize_message(text),
+                )
+        record_openai_usage("embedding", getattr(result, "usage", None))
+    except Exception:
+        logger.warning("embedding failed; skipping the semantic cache tier", exc_info=True)
+        return None
+    return unit_vector(result.data[0].embedding)
+
+
+async def lookup_cached_reply(message: str, history) -> CacheLookup:
+    if response_cache is None:
+        return CacheLookup()
+    _, kept = trim_history(history, settings.CHAT_HISTORY_TOKEN_BUDGET)
+    lookup = CacheLookup(key=response_cache.key(message, kept))
+    lookup.reply = await response_cache.get(lookup.key)
+    # Replies that depend on earlier turns are only reused on an exact match.
+    if lookup.reply is None and response_cache.semantic_enabled and not history:
+        lookup.vector = await embed(message)
+        if lookup.vector is not None:
+            lookup.reply = await response_cache.get_similar(lookup.vector)
+    if lookup.reply is None:
+        response_cache.record_miss()
+    return lookup
+
+
+async def store_cached_reply(lookup: CacheLookup, reply: str) -> None:
+    if response_cache is None or lookup.key is None or not reply or reply == FALLBACK_REPLY:
+        return
+    await response_cache.set(lookup.key, reply, lookup.vector)
+
+
+async def generate_response(message: str, history):
+    client = get_client()
+    lookup = await lookup_cached_reply(message, history)
+    if lookup.reply is not None:
+        return lookup.reply
+    prompt = await prepare_prompt(history, message)
+
+    async with _upstream_slots:
+        with openai_call("chat"):
+            response = await client.responses.create(
+                model=settings.OPENAI_MODEL,
+                input=prompt,
+                temperature=0.7,
+            )
+    record_openai_usage("chat", getattr(response, "usage", None))
+
+    reply = extract_response_text(response)
+    await store_cached_reply(lookup, reply)
+    return reply
 
 
-def generate_response(message: str, history):
+async def stream_response(message: str, history) -> AsyncIterator[str]:
     client = get_client()
-    prompt = build_prompt(history, message)
+    lookup = await lookup_cached_reply(message, history)
+    if lookup.reply is not None:
+        yield lookup.reply
+        return
+    prompt = await prepare_prompt(history, message)
+    parts = []
 
-    response = client.responses.create(
-        model=settings.OPENAI_MODEL,
-        input=prompt,
-        temperature=0.7,
-    )
+    async with _upstream_slots:
+        with openai_call("chat_stream"):
+            stream = await client.responses.create(
+                model=settings.OPENAI_MODEL,
+                input=prompt,
+                temperature=0.7,
+                stream=True,
+            )
+            async for event in stream:
+                if event.type == "response.output_text.delta" and event.delta:
+                    parts.append(event.delta)
+                    yield event.delta
+                elif event.type == "response.completed":
+                    record_openai_usage("chat_stream", getattr(event.response, "usage", None))
+                elif event.type in ("error", "response.failed"):
+                    raise RuntimeError("AI response failed")
 
-    return extract_response_text(response)
+    await store_cached_reply(lookup, "".join(parts))
@@ -0,0 +1,111 @@
+import re
+import unicodedata
+from collections import deque
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from app.core.config import settings
+
+DEFAULT_PHRASES_PATH = Path(__file__).resolve().parent / "crisis_phrases.txt"
+
+# Look-alike letters from other scripts and common digit/symbol substitutions, folded to ASCII.
+CONFUSABLES = str.maketrans(
+    {
+        "а": "a", "в": "b", "е": "e", "ё": "e", "к": "k", "м": "m", "н": "h", "о": "o",
+        "р": "p", "с": "c", "т": "t", "у": "y", "х": "x", "і": "i", "ї": "i", "ј": "j",
+        "ѕ": "s", "ԁ": "d", "ɡ": "g", "α": "a", "β": "b", "ε": "e", "ι": "i", "κ": "k",
+        "ο": "o", "ρ": "p", "τ": "t", "υ": "u", "ν": "v", "χ": "x",
+        "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "@": "a", "$": "s",
+        "!": "i", "|": "l",
+    }
+)
+_NON_WORD = re.compile(r"[^a-z]+")
+
+
+def normalize(text: str) -> str:
+    """Fold ``text`` to lowercase ASCII words separated by single spaces, padded with one space
+    on each side so phrases only match whole words."""
+    folded = text.casefold()
+    if not folded.isascii():
+        # Drop accents and invisible format characters (zero-width spaces/joiners) before folding.
+        folded = "".join(
+            ch
+            for ch in unicodedata.normalize("NFKD", folded)
+            if not unicodedata.combining(ch) and unicodedata.category(ch) != "Cf"
+        )
+    return f" {_NON_WORD.sub(' ', folded.translate(CONFUSABLES)).strip()} "
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton: finds any of a fixed set of phrases in one pass over the text,
+    independent of how many phrases there are."""
+
+    def __init__(self, phrases: Iterable[str]):
+        self._goto: List[dict] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Optional[str]] = [None]
+        for phrase in phrases:
+            self._add(phrase)
+        self._link()
+
+    def _add(self, phrase: str) -> None:
+        # Keys keep the padding on both sides, so "want to die" never matches "want to diet".
+        key = normalize(phrase)
+        if not key.strip():
+            return
+        state = 0
+        for ch in key:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+            state = nxt
+        self._output[state] = phrase
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                if self._output[nxt] is None:
+                    self._output[nxt] = self._output[self._fail[nxt]]
+
+    def search(self, text: str) -> Optional[str]:
+        """Return the first phrase found in ``text`` (after normalization), or ``None``."""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for ch in normalize(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state] is not None:
+                return output[state]
+        return None
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+
+def load_phrases(path: Optional[str] = None) -> List[str]:
+    source = Path(path) if path else DEFAULT_PHRASES_PATH
+    phrases = []
+    for line in source.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            phrases.append(line)
+    return phrases
+
+
+matcher = PhraseMatcher(load_phrases(settings.CRISIS_PHRASES_PATH))
+
+
+def detect_crisis(text: str) -> bool:
+    return matcher.search(text) is not None
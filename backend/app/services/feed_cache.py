@@ -0,0 +1,114 @@
+import asyncio
+import json
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.schemas import PostOut
+from app.services.response_cache import MemoryBackend, RedisBackend
+
+FeedPage = Tuple[str, Optional[str]]
+
+_posts_adapter = TypeAdapter(List[PostOut])
+
+
+def serialize_posts(rows) -> str:
+    return _posts_adapter.dump_json(_posts_adapter.validate_python(rows, from_attributes=True)).decode()
+
+
+class FeedCache:
+    """Pre-serialized first pages of the public feed, keyed by feed version, category, limit and excerpt.
+
+    The feed version (``resource_versions`` row ``posts``) is bumped by every post write, so
+    a write makes every cached page unreachable on all workers at once; writers also clear
+    the local tier to free memory straight away. Rebuilds are single-flight per key within a
+    worker, so a burst of requests after a write costs one query per worker, not one each.
+    A key's lock lives only while requests are waiting on it, and at most ``max_pending``
+    keys are tracked; beyond that (e.g. a flood of made-up categories) misses just rebuild.
+    """
+
+    def __init__(self, backend, ttl: int, max_pending: int = 256):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_pending = max_pending
+        # key -> [lock, number of requests holding or waiting for it]
+        self._locks: Dict[str, list] = {}
+        self.counters = {"hits": 0, "misses": 0, "errors": 0}
+
+    @staticmethod
+    def key(version: int, category: Optional[str], limit: int, excerpt: Optional[int] = None) -> str:
+        return f"{version}:{limit}:{excerpt or ''}:{category or ''}"
+
+    async def _get(self, key: str) -> Optional[FeedPage]:
+        try:
+            cached = await self.backend.get(key)
+        except Exception:
+            self.counters["errors"] += 1
+            return None
+        if cached is None:
+            return None
+        body, next_cursor = json.loads(cached)
+        return body, next_cursor
+
+    async def _set(self, key: str, page: FeedPage) -> None:
+        try:
+            await self.backend.set(key, json.dumps(page), self.ttl)
+        except Exception:
+            self.counters["errors"] += 1
+
+    async def get_or_build(self, key: str, build: Callable[[], Awaitable[FeedPage]]) -> FeedPage:
+        page = await self._get(key)
+        if page is not None:
+            self.counters["hits"] += 1
+            return page
+        if key not in self._locks and len(self._locks) >= self.max_pending:
+            self.counters["misses"] += 1
+            return await self._build(key, build)
+        entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                page = await self._get(key)
+                if page is not None:
+                    self.counters["hits"] += 1
+                    return page
+                self.counters["misses"] += 1
+                return await self._build(key, build)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                self._locks.pop(key, None)
+
+    async def _build(self, key: str, build: Callable[[], Awaitable[FeedPage]]) -> FeedPage:
+        page = await build()
+        await self._set(key, page)
+        return page
+
+    async def invalidate(self) -> None:
+        try:
+            await self.backend.clear()
+        except Exception:
+            self.counters["errors"] += 1
+
+    def stats(self) -> dict:
+        return dict(self.counters)
+
+
+class RedisFeedBackend(RedisBackend):
+    async def clear(self) -> None:
+        # Keys embed the feed version, so stale pages are already unreachable and expire on their TTL.
+        return None
+
+
+def build_feed_cache() -> Optional[FeedCache]:
+    if not settings.FEED_CACHE_ENABLED:
+        return None
+    if settings.FEED_CACHE_BACKEND == "redis":
+        backend = RedisFeedBackend(prefix="selenly:feed:")
+    else:
+        backend = MemoryBackend(settings.FEED_CACHE_MAX_ENTRIES, settings.FEED_CACHE_TTL_SECONDS)
+    return FeedCache(backend, ttl=settings.FEED_CACHE_TTL_SECONDS, max_pending=settings.FEED_CACHE_MAX_ENTRIES)
+
+
+feed_cache = build_feed_cache()
@@ -0,0 +1,157 @@
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import async_engine, upsert_insert
+from app.models import MoodDailyRollup
+
+ENERGY_SCORES = {"low": 1, "steady": 2, "high": 3}
+
+def normalize_value(value: Optional[str]) -> str:
+    return " ".join((value or "").split()).casefold()
+
+
+def mood_deltas(created_at: datetime, mood: Optional[str], energy: Optional[str], sign: int = 1) -> Counter:
+    """Rollup count changes for adding (``sign=1``) or removing (``sign=-1``) one entry."""
+    if created_at is None:
+        return Counter()
+    day = created_at.date()
+    deltas = Counter({(day, "mood", normalize_value(mood)): sign})
+    energy_value = normalize_value(energy)
+    if energy_value:
+        deltas[(day, "energy", energy_value)] += sign
+    return deltas
+
+
+def entry_deltas(entry, sign: int = 1) -> Counter:
+    return mood_deltas(entry.created_at, entry.mood, entry.energy, sign)
+
+def rollup_statements(dialect_name: str, user_id: int, deltas: Counter) -> list:
+    """Statements folding ``deltas`` into the user's rollup rows.
+
+    One multi-row upsert, so concurrent writers for the same day add up instead of racing
+    on the insert, followed by a cleanup of rows that dropped to zero.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return []
+    stmt = upsert_insert(dialect_name)(MoodDailyRollup).values(
+        [
+            {"user_id": user_id, "day": day, "dimension": dimension, "value": value, "count": delta}
+            for (day, dimension, value), delta in deltas.items()
+        ]
+    )
+    statements = [
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "day", "dimension", "value"],
+            set_={"count": MoodDailyRollup.count + stmt.excluded.count},
+        )
+    ]
+    if any(delta < 0 for delta in deltas.values()):
+        statements.append(
+            delete(MoodDailyRollup)
+            .where(MoodDailyRollup.user_id == user_id, MoodDailyRollup.count <= 0)
+            .execution_options(synchronize_session=False)
+        )
+    return statements
+
+
+async def apply_rollup_deltas(db: AsyncSession, user_id: int, deltas: Counter) -> None:
+    """Apply ``deltas`` in the caller's transaction."""
+    for stmt in rollup_statements(async_engine.dialect.name, user_id, deltas):
+        await db.execute(stmt)
+
+
+def period_start(day: date, period: str) -> date:
+    return day - timedelta(days=day.weekday()) if period == "week" else day
+
+
+def _streaks(days: List[date], today: date) -> Tuple[int, int]:
+    longest = run = 0
+    previous = None
+    for day in days:
+        run = run + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, run)
+        previous = day
+    # The current streak survives until the end of the day after the last entry.
+    current = run if previous is not None and today - previous <= timedelta(days=1) else 0
+    return current, longest
+
+
+def _score(energy: Dict[str, int]) -> Tuple[int, int]:
+    total = sum(ENERGY_SCORES[value] * count for value, count in energy.items() if value in ENERGY_SCORES)
+    scored = sum(count for value, count in energy.items() if value in ENERGY_SCORES)
+    return total, scored
+
+
+async def mood_stats(db: AsyncSession, user_id: int, days: int, period: str, window: int, today: date) -> dict:
+    """Per-period mood/energy counts, energy score and its trailing ``window``-period average.
+
+    Reads only rollup rows, so the cost scales with the number of days in range rather than
+    with the number of entries.
+    """
+    step = timedelta(days=7 if period == "week" else 1)
+    end = period_start(today, period)
+    start = period_start(today - timedelta(days=days - 1), period)
+    warmup_start = start - step * (window - 1)
+
+    rows = await db.execute(
+        select(MoodDailyRollup.day, MoodDailyRollup.dimension, MoodDailyRollup.value, MoodDailyRollup.count).where(
+            MoodDailyRollup.user_id == user_id,
+            MoodDailyRollup.day >= warmup_start,
+            MoodDailyRollup.day <= today,
+        )
+    )
+    buckets: Dict[date, Dict[str, Counter]] = defaultdict(lambda: {"mood": Counter(), "energy": Counter()})
+    for day, dimension, value, count in rows:
+        buckets[period_start(day, period)][dimension][value] += count
+
+    series: List[dict] = []
+    window_scores: List[Tuple[int, int]] = []
+    cursor = warmup_start
+    totals = {"entries": 0, "active_periods": 0}
+    while cursor <= end:
+        bucket = buckets.get(cursor) or {"mood": Counter(), "energy": Counter()}
+        total, scored = _score(bucket["energy"])
+        window_scores = (window_scores + [(total, scored)])[-window:]
+        if cursor >= start:
+            window_total = sum(item[0] for item in window_scores)
+            window_scored = sum(item[1] for item in window_scores)
+            entries = sum(bucket["mood"].values())
+            totals["entries"] += entries
+            totals["active_periods"] += 1 if entries else 0
+            series.append(
+                {
+                    "start": cursor,
+                    "entries": entries,
+                    "moods": dict(bucket["mood"]),
+                    "energy": dict(bucket["energy"]),
+                    "energy_score": round(total / scored, 3) if scored else None,
+                    "energy_moving_average": round(window_total / window_scored, 3) if window_scored else None,
+                }
+            )
+        cursor += step
+
+    logged_days = (
+        await db.execute(
+            select(MoodDailyRollup.day)
+            .where(MoodDailyRollup.user_id == user_id, MoodDailyRollup.dimension == "mood")
+            .distinct()
+            .order_by(MoodDailyRollup.day)
+        )
+    ).scalars().all()
+    current_streak, longest_streak = _streaks(logged_days, today)
+
+    return {
+        "start": start,
+        "end": today,
+        "period": period,
+        "periods": series,
+        "totals": totals,
+        "current_streak": current_streak,
+        "longest_streak": longest_streak,
+    }
+
@@ -0,0 +1,30 @@
+import logging
+
+from app.core.config import settings
+from app.core.jobs import enqueue, job
+
+logger = logging.getLogger("selenly.email")
+
+
+@job("send_email")
+async def send_email(to: str, subject: str, body: str) -> None:
+    # Delivery is still stubbed; swap this for an SMTP/API call without touching the callers.
+    logger.info("email from=%s to=%s subject=%s", settings.EMAIL_FROM, to, subject)
+
+
+async def queue_password_reset_email(email: str, token: str) -> None:
+    await enqueue(
+        "send_email",
+        to=email,
+        subject="Reset your Selenly password",
+        body=f"Use this link within the next hour to choose a new password: {settings.FRONTEND_URL}/reset-password?token={token}",
+    )
+
+
+async def queue_verification_email(email: str, token: str) -> None:
+    await enqueue(
+        "send_email",
+        to=email,
+        subject="Confirm your Selenly email",
+        body=f"Confirm your email address: {settings.FRONTEND_URL}/verify-email?token={token}",
+    )
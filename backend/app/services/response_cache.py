@@ -0,0 +1,154 @@
+import hashlib
+import math
+import operator
+import re
+import threading
+import time
+from typing import List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis_client import get_redis
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+
+
+def normalize_message(text: str) -> str:
+    return " ".join(_PUNCTUATION.sub(" ", text.casefold()).split())
+
+
+class MemoryBackend:
+    def __init__(self, max_entries: int, ttl: int):
+        self._cache = TTLCache(max_size=max_entries, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    async def clear(self) -> None:
+        self._cache.clear()
+
+
+class RedisBackend:
+    def __init__(self, prefix: str = "selenly:chat:"):
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[str]:
+        return await get_redis().get(self.prefix + key)
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        await get_redis().set(self.prefix + key, value, ex=ttl)
+
+
+class ResponseCache:
+    """Two-tier cache for chat replies.
+
+    The exact tier is keyed on the normalized message plus a digest of the (already trimmed)
+    history and lives in the configured backend. The optional semantic tier only covers
+    messages sent without history: it keeps a bounded in-process list of unit-length
+    embeddings and returns the stored reply of the nearest one above the threshold.
+    Only the newest ``semantic_scan_limit`` embeddings are compared, in a worker thread.
+    """
+
+    def __init__(
+        self,
+        backend,
+        ttl: int,
+        similarity_threshold: float = 0.0,
+        semantic_max_entries: int = 0,
+        semantic_scan_limit: int = 0,
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.semantic_max_entries = semantic_max_entries
+        self.semantic_scan_limit = semantic_scan_limit or semantic_max_entries
+        self._vectors: List[tuple] = []
+        self._lock = threading.Lock()
+        self.counters = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "errors": 0}
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.similarity_threshold > 0 and self.semantic_max_entries > 0
+
+    def key(self, message: str, history) -> str:
+        digest = hashlib.sha256(normalize_message(message).encode())
+        for item in history:
+            digest.update(f"\x00{item.role}\x00{item.content}".encode())
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            reply = await self.backend.get(key)
+        except Exception:
+            self.counters["errors"] += 1
+            return None
+        if reply is not None:
+            self.counters["exact_hits"] += 1
+        return reply
+
+    def _nearest(self, candidates: List[tuple], vector: List[float]) -> Optional[str]:
+        best_score, best_reply = self.similarity_threshold, None
+        for _, stored, reply in candidates:
+            score = sum(map(operator.mul, stored, vector))
+            if score >= best_score:
+                best_score, best_reply = score, reply
+        return best_reply
+
+    async def get_similar(self, vector: List[float]) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            # Entries share one TTL and are appended in order, so the expired ones are a prefix.
+            expired = next((index for index, entry in enumerate(self._vectors) if entry[0] > now), len(self._vectors))
+            del self._vectors[:expired]
+            candidates = self._vectors[-self.semantic_scan_limit:]
+        if not candidates:
+            return None
+        best_reply = await run_in_threadpool(self._nearest, candidates, vector)
+        if best_reply is not None:
+            self.counters["semantic_hits"] += 1
+        return best_reply
+
+    def record_miss(self) -> None:
+        self.counters["misses"] += 1
+
+    async def set(self, key: str, reply: str, vector: Optional[List[float]] = None) -> None:
+        try:
+            await self.backend.set(key, reply, self.ttl)
+        except Exception:
+            self.counters["errors"] += 1
+        if vector is not None and self.semantic_enabled:
+            with self._lock:
+                self._vectors.append((time.monotonic() + self.ttl, vector, reply))
+                del self._vectors[: max(0, len(self._vectors) - self.semantic_max_entries)]
+
+    def stats(self) -> dict:
+        return {**self.counters, "semantic_entries": len(self._vectors)}
+
+
+def unit_vector(values) -> List[float]:
+    norm = math.sqrt(sum(value * value for value in values)) or 1.0
+    return [value / norm for value in values]
+
+
+def build_response_cache() -> Optional[ResponseCache]:
+    if not settings.CHAT_CACHE_ENABLED:
+        return None
+    if settings.CHAT_CACHE_BACKEND == "redis":
+        backend = RedisBackend()
+    else:
+        backend = MemoryBackend(settings.CHAT_CACHE_MAX_ENTRIES, settings.CHAT_CACHE_TTL_SECONDS)
+    return ResponseCache(
+        backend,
+        ttl=settings.CHAT_CACHE_TTL_SECONDS,
+        similarity_threshold=settings.CHAT_CACHE_SIMILARITY_THRESHOLD,
+        semantic_max_entries=settings.CHAT_CACHE_SEMANTIC_MAX_ENTRIES,
+        semantic_scan_limit=settings.CHAT_CACHE_SEMANTIC_SCAN_LIMIT,
+    )
+
+
+response_cache = build_response_cache()
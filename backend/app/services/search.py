@@ -0,0 +1,107 @@
+import html
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import async_engine
+
+# Private-use code points mark hits so the text can be HTML-escaped before they become <mark>.
+_HIT_START = "\ue000"
+_HIT_END = "\ue001"
+_WORD = re.compile(r"\w+")
+
+SearchHit = Tuple[int, float, str]
+
+# SQLite: FTS5 external-content tables kept in sync by triggers (migration 0010).
+# bm25() is lower-is-better, so it is negated to give the same "higher is better" rank as Postgres.
+_SQLITE_POSTS = text(
+    """
+    SELECT posts_fts.rowid, -bm25(posts_fts, 5.0, 1.0) AS rank,
+           snippet(posts_fts, -1, :hit_start, :hit_end, '…', 16) AS snippet
+    FROM posts_fts
+    WHERE posts_fts MATCH :query
+    ORDER BY rank DESC, posts_fts.rowid DESC
+    LIMIT :limit OFFSET :offset
+    """
+)
+_SQLITE_JOURNALS = text(
+    """
+    SELECT journals_fts.rowid, -bm25(journals_fts, 5.0, 1.0, 1.0) AS rank,
+           snippet(journals_fts, -1, :hit_start, :hit_end, '…', 16) AS snippet
+    FROM journals_fts
+    JOIN journals ON journals.id = journals_fts.rowid
+    WHERE journals_fts MATCH :query AND journals.user_id = :user_id
+    ORDER BY rank DESC, journals_fts.rowid DESC
+    LIMIT :limit OFFSET :offset
+    """
+)
+
+# Postgres: weighted generated tsvector columns with GIN indexes.
+_HEADLINE_OPTIONS = f"StartSel={_HIT_START}, StopSel={_HIT_END}, MaxWords=24, MinWords=8, MaxFragments=2"
+_POSTGRES_POSTS = text(
+    """
+    SELECT posts.id, ts_rank_cd(posts.search_vector, query) AS rank,
+           ts_headline('english', posts.title || ' ' || posts.body, query, :options) AS snippet
+    FROM posts, websearch_to_tsquery('english', :query) AS query
+    WHERE posts.search_vector @@ query
+    ORDER BY rank DESC, posts.id DESC
+    LIMIT :limit OFFSET :offset
+    """
+)
+_POSTGRES_JOURNALS = text(
+    """
+    SELECT journals.id, ts_rank_cd(journals.search_vector, query) AS rank,
+           ts_headline(
+               'english',
+               concat_ws(' ', journals.title, journals.body, journals.gratitude),
+               query,
+               :options
+           ) AS snippet
+    FROM journals, websearch_to_tsquery('english', :query) AS query
+    WHERE journals.user_id = :user_id AND journals.search_vector @@ query
+    ORDER BY rank DESC, journals.id DESC
+    LIMIT :limit OFFSET :offset
+    """
+)
+
+
+def fts5_query(raw: str) -> Optional[str]:
+    """Turn free text into an FTS5 query: every word must match, the last one as a prefix.
+
+    Words are quoted, so FTS5 operators and punctuation in user input are never interpreted.
+    """
+    words = _WORD.findall(raw)
+    if not words:
+        return None
+    quoted = [f'"{word}"' for word in words]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def highlight(snippet: Optional[str]) -> str:
+    escaped = html.escape(snippet or "")
+    return escaped.replace(_HIT_START, "<mark>").replace(_HIT_END, "</mark>")
+
+
+async def _search(db: AsyncSession, sqlite_stmt, postgres_stmt, raw: str, limit: int, offset: int, **params) -> List[SearchHit]:
+    if async_engine.dialect.name == "postgresql":
+        stmt, query = postgres_stmt, raw
+        params["options"] = _HEADLINE_OPTIONS
+    else:
+        stmt, query = sqlite_stmt, fts5_query(raw)
+        params.update(hit_start=_HIT_START, hit_end=_HIT_END)
+    if not query:
+        return []
+    rows = await db.execute(stmt, {"query": query, "limit": limit, "offset": offset, **params})
+    return [(row_id, float(rank or 0.0), highlight(snippet)) for row_id, rank, snippet in rows]
+
+
+async def search_posts(db: AsyncSession, raw: str, limit: int, offset: int) -> List[SearchHit]:
+    """Ranked ``(post_id, rank, snippet)`` hits; ``limit`` is passed through unchanged."""
+    return await _search(db, _SQLITE_POSTS, _POSTGRES_POSTS, raw, limit, offset)
+
+
+async def search_journals(db: AsyncSession, user_id: int, raw: str, limit: int, offset: int) -> List[SearchHit]:
+    return await _search(db, _SQLITE_JOURNALS, _POSTGRES_JOURNALS, raw, limit, offset, user_id=user_id)
@@ -0,0 +1,277 @@
+import base64
+import json
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, case, delete, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.http_cache import bump_version, get_version, user_scope
+from app.core.pagination import naive_utc
+from app.db import AsyncSessionLocal, async_engine, upsert_insert
+from app.models import ResourceVersion, SyncTombstone
+from app.services.mood_stats import apply_rollup_deltas
+
+# (entry, sign) -> rollup deltas; only moods keep rollups.
+RollupFn = Callable[[object, int], Counter]
+
+
+def pruned_scope(resource: str, user_id: int) -> str:
+    """Scope holding the highest tombstone version pruned for a user's resource."""
+    return user_scope(f"{resource}-pruned", user_id)
+
+
+def encode_sync_cursor(entries: Tuple[int, int], tombstones: Tuple[int, int]) -> str:
+    raw = json.dumps({"e": list(entries), "t": list(tombstones)}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_sync_cursor(cursor: Optional[str]) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    if not cursor:
+        return (-1, 0), (-1, 0)
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        entries, tombstones = data["e"], data["t"]
+        return (int(entries[0]), int(entries[1])), (int(tombstones[0]), int(tombstones[1]))
+    except (ValueError, TypeError, KeyError, IndexError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _ref_filter(model, refs) -> Optional[object]:
+    ids = [ref.id for ref in refs if ref.id is not None]
+    client_ids = [ref.client_id for ref in refs if ref.id is None and ref.client_id]
+    clauses = []
+    if ids:
+        clauses.append(model.id.in_(ids))
+    if client_ids:
+        clauses.append(model.client_id.in_(client_ids))
+    return or_(*clauses) if clauses else None
+
+
+def _match(entries, ref):
+    for entry in entries:
+        if (ref.id is not None and entry.id == ref.id) or (ref.id is None and ref.client_id and entry.client_id == ref.client_id):
+            return entry
+    return None
+
+
+async def apply_batch(
+    db: AsyncSession,
+    model,
+    resource: str,
+    user_id: int,
+    batch,
+    rollup: Optional[RollupFn] = None,
+) -> dict:
+    """Apply a batch of creates, updates and deletes for one user; the caller commits.
+
+    Creates are one multi-row ``INSERT ... ON CONFLICT DO NOTHING`` on ``(user_id, client_id)``,
+    so replaying a batch after a lost response returns the stored rows instead of
+    duplicating them. Every touched row and tombstone is stamped with the scope version
+    bumped for this batch, which ``changes_since`` pages on.
+    """
+    version = await bump_version(db, user_scope(resource, user_id))
+    now = datetime.utcnow()
+    deltas = Counter()
+    fields = [column.name for column in model.__table__.columns if column.name not in ("id", "user_id", "client_id", "sync_version", "created_at")]
+
+    created: List = []
+    if batch.create:
+        rows = {}
+        for item in batch.create:
+            data = item.dict()
+            rows.setdefault(item.client_id, {
+                **{field: data.get(field) for field in fields},
+                "user_id": user_id,
+                "client_id": item.client_id,
+                "created_at": naive_utc(item.created_at) or now,
+                "sync_version": version,
+            })
+        stmt = (
+            upsert_insert(async_engine.dialect.name)(model)
+            .values(list(rows.values()))
+            .on_conflict_do_nothing(index_elements=["user_id", "client_id"])
+            .returning(model)
+        )
+        inserted = (await db.scalars(stmt)).all()
+        if rollup:
+            for entry in inserted:
+                deltas.update(rollup(entry, 1))
+        created = (
+            await db.scalars(select(model).where(model.user_id == user_id, model.client_id.in_(list(rows))))
+        ).all()
+        order = {client_id: index for index, client_id in enumerate(rows)}
+        created = sorted(created, key=lambda entry: order[entry.client_id])
+
+    not_found = []
+    updated = []
+    if batch.update:
+        condition = _ref_filter(model, batch.update)
+        targets = (await db.scalars(select(model).where(model.user_id == user_id, condition))).all() if condition is not None else []
+        for item in batch.update:
+            entry = _match(targets, item)
+            if entry is None:
+                not_found.append({"id": item.id, "client_id": item.client_id})
+                continue
+            if rollup:
+                deltas.update(rollup(entry, -1))
+            for field, value in item.dict(exclude_unset=True, exclude={"id", "client_id"}).items():
+                setattr(entry, field, value)
+            entry.sync_version = version
+            if rollup:
+                deltas.update(rollup(entry, 1))
+            if entry not in updated:
+                updated.append(entry)
+
+    deleted = []
+    if batch.delete:
+        condition = _ref_filter(model, batch.delete)
+        targets = (await db.scalars(select(model).where(model.user_id == user_id, condition))).all() if condition is not None else []
+        for item in batch.delete:
+            entry = _match(targets, item)
+            if entry is None:
+                not_found.append({"id": item.id, "client_id": item.client_id})
+            elif entry.id not in deleted:
+                deleted.append(entry.id)
+                if rollup:
+                    deltas.update(rollup(entry, -1))
+        if deleted:
+            # Flush pending updates first so the bulk DELETE doesn't leave them targeting gone rows.
+            await db.flush()
+            await db.execute(
+                insert(SyncTombstone),
+                [
+                    {"user_id": user_id, "resource": resource, "entry_id": entry.id, "client_id": entry.client_id, "sync_version": version, "deleted_at": now}
+                    for entry in targets
+                    if entry.id in deleted
+                ],
+            )
+            await db.execute(delete(model).where(model.id.in_(deleted)).execution_options(synchronize_session=False))
+            updated = [entry for entry in updated if entry.id not in deleted]
+
+    if rollup:
+        await db.flush()
+        await apply_rollup_deltas(db, user_id, deltas)
+    return {"created": created, "updated": updated, "deleted": deleted, "not_found": not_found}
+
+
+def record_tombstone(db: AsyncSession, resource: str, entry, version: int) -> None:
+    db.add(
+        SyncTombstone(
+            user_id=entry.user_id,
+            resource=resource,
+            entry_id=entry.id,
+            client_id=entry.client_id,
+            sync_version=version,
+        )
+    )
+
+
+async def changes_since(db: AsyncSession, model, resource: str, user_id: int, cursor: Optional[str], limit: int) -> dict:
+    """Entries written and entries deleted after ``cursor``, oldest first.
+
+    Both streams are keyset-paginated on ``(sync_version, id)``. Versions are assigned under
+    the scope row's lock, so they commit in order and a cursor never skips a late commit.
+    A cursor from before the newest pruned tombstone would miss deletions, so it gets a 410
+    and the client has to resync from scratch.
+    """
+    (entry_version, entry_id), (tomb_version, tomb_id) = decode_sync_cursor(cursor)
+    if cursor:
+        pruned = await get_version(db, pruned_scope(resource, user_id))
+        if pruned and tomb_version < pruned:
+            raise HTTPException(status_code=410, detail="Sync cursor expired; resync without a cursor")
+
+    entries = (
+        await db.scalars(
+            select(model)
+            .where(
+                model.user_id == user_id,
+                or_(
+                    model.sync_version > entry_version,
+                    and_(model.sync_version == entry_version, model.id > entry_id),
+                ),
+            )
+            .order_by(model.sync_version, model.id)
+            .limit(limit + 1)
+        )
+    ).all()
+    tombstones = (
+        await db.scalars(
+            select(SyncTombstone)
+            .where(
+                SyncTombstone.user_id == user_id,
+                SyncTombstone.resource == resource,
+                or_(
+                    SyncTombstone.sync_version > tomb_version,
+                    and_(SyncTombstone.sync_version == tomb_version, SyncTombstone.id > tomb_id),
+                ),
+            )
+            .order_by(SyncTombstone.sync_version, SyncTombstone.id)
+            .limit(limit + 1)
+        )
+    ).all()
+
+    has_more = len(entries) > limit or len(tombstones) > limit
+    entries, tombstones = entries[:limit], tombstones[:limit]
+    if entries:
+        entry_version, entry_id = entries[-1].sync_version, entries[-1].id
+    if tombstones:
+        tomb_version, tomb_id = tombstones[-1].sync_version, tombstones[-1].id
+    return {
+        "changes": entries,
+        "deleted": [
+            {"id": tombstone.entry_id, "client_id": tombstone.client_id, "deleted_at": tombstone.deleted_at}
+            for tombstone in tombstones
+        ],
+        "cursor": encode_sync_cursor((entry_version, entry_id), (tomb_version, tomb_id)),
+        "has_more": has_more,
+    }
+
+
+async def prune_tombstones(batch_size: int, now: datetime) -> int:
+    """Delete tombstones older than ``SYNC_TOMBSTONE_RETENTION_DAYS``, ``batch_size`` at a time.
+
+    Each batch raises the per-user pruned watermark in the same transaction, so
+    ``changes_since`` can tell which cursors predate what was removed.
+    """
+    if settings.SYNC_TOMBSTONE_RETENTION_DAYS <= 0:
+        return 0
+    cutoff = now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    deleted = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            rows = (
+                await db.execute(
+                    select(SyncTombstone.id, SyncTombstone.user_id, SyncTombstone.resource, SyncTombstone.sync_version)
+                    .where(SyncTombstone.deleted_at < cutoff)
+                    .limit(batch_size)
+                )
+            ).all()
+            if not rows:
+                return deleted
+            watermarks = {}
+            for row in rows:
+                scope = pruned_scope(row.resource, row.user_id)
+                watermarks[scope] = max(watermarks.get(scope, 0), row.sync_version)
+            stmt = upsert_insert(async_engine.dialect.name)(ResourceVersion)
+            await db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["scope"],
+                    set_={
+                        "version": case(
+                            (ResourceVersion.version > stmt.excluded.version, ResourceVersion.version),
+                            else_=stmt.excluded.version,
+                        )
+                    },
+                ),
+                [{"scope": scope, "version": version} for scope, version in watermarks.items()],
+            )
+            await db.execute(delete(SyncTombstone).where(SyncTombstone.id.in_([row.id for row in rows])))
+            await db.commit()
+        deleted += len(rows)
+        if len(rows) < batch_size:
+            return deleted
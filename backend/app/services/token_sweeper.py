@@ -0,0 +1,74 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, or_, select
+
+from app.core.config import settings
+from app.core.jobs import job
+from app.db import AsyncSessionLocal
+from app.models import EmailVerificationToken, PasswordResetToken, RefreshToken, SyncTombstone
+from app.services.sync import prune_tombstones
+
+logger = logging.getLogger("selenly.tokens")
+
+_sweeper_task: Optional[asyncio.Task] = None
+
+
+def _dead_condition(model, now: datetime):
+    flag = model.revoked if model is RefreshToken else model.used
+    return or_(model.expires_at < now, flag.is_(True))
+
+
+async def sweep_table(model, batch_size: int, now: datetime) -> int:
+    """Delete dead rows ``batch_size`` at a time, committing between batches so no single
+    transaction holds locks on a large slice of the table."""
+    deleted = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            ids = select(model.id).where(_dead_condition(model, now)).limit(batch_size).scalar_subquery()
+            result = await db.execute(delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False))
+            await db.commit()
+        deleted += result.rowcount or 0
+        if (result.rowcount or 0) < batch_size:
+            return deleted
+
+
+async def sweep_expired_tokens(batch_size: Optional[int] = None) -> dict:
+    batch_size = batch_size or settings.TOKEN_SWEEP_BATCH_SIZE
+    now = datetime.utcnow()
+    counts = {}
+    for model in (RefreshToken, EmailVerificationToken, PasswordResetToken):
+        counts[model.__tablename__] = await sweep_table(model, batch_size, now)
+    counts[SyncTombstone.__tablename__] = await prune_tombstones(batch_size, now)
+    logger.info("token sweep deleted %s", counts)
+    return counts
+
+
+@job("sweep_tokens")
+async def sweep_tokens_job(batch_size: Optional[int] = None) -> None:
+    await sweep_expired_tokens(batch_size)
+
+
+async def _sweep_periodically(interval: int) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await sweep_expired_tokens()
+        except Exception:
+            logger.exception("token sweep failed")
+
+
+def start_periodic_sweeper() -> None:
+    global _sweeper_task
+    if settings.TOKEN_SWEEP_INTERVAL_SECONDS > 0 and _sweeper_task is None:
+        _sweeper_task = asyncio.create_task(_sweep_periodically(settings.TOKEN_SWEEP_INTERVAL_SECONDS))
+
+
+async def stop_periodic_sweeper() -> None:
+    global _sweeper_task
+    if _sweeper_task is not None:
+        _sweeper_task.cancel()
+        await asyncio.gather(_sweeper_task, return_exceptions=True)
+        _sweeper_task = None
@@ -0,0 +1,24 @@
+"""Background job worker for ``JOB_BACKEND=sql``: ``python -m app.worker``."""
+
+import asyncio
+import logging
+
+from app.core.jobs import SQLQueue
+from app.db import async_engine
+from app.services import notifications, token_sweeper  # noqa: F401  (registers job handlers)
+
+
+async def run() -> None:
+    try:
+        await SQLQueue().run_forever()
+    finally:
+        await async_engine.dispose()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s [%(name)s] %(message)s")
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""In-process load benchmark of the API: p50/p95/p99 latency and throughput per endpoint.
+
+Drives the real ASGI app (middleware included) through httpx's ASGI transport, so the
+numbers cover routing, auth, queries and serialization without network noise. OpenAI
+calls go to ``scripts.fake_openai`` the same way. Run from ``backend/``::
+
+    BENCH_PREPARE=true python -m scripts.bench_api                  # SQLite, ./bench.db
+    DATABASE_URL=postgresql://localhost/selenly_bench BENCH_PREPARE=true python -m scripts.bench_api
+
+``BENCH_PREPARE=true`` migrates the database and loads ``scripts.generate_data`` (sized by
+the ``GEN_*`` variables); later runs against the same database can skip it.
+``BENCH_REQUESTS`` and ``BENCH_CONCURRENCY`` set the load per scenario and
+``BENCH_SCENARIOS`` picks scenarios (comma-separated, default all).
+
+Results are compared with ``BENCH_BASELINE`` (default ``benchmarks/baseline-<dialect>.json``);
+``BENCH_SAVE_BASELINE=true`` overwrites it with this run. With ``BENCH_MAX_REGRESSION`` set
+(percent), the run exits non-zero when any scenario's p95 is that much slower than the baseline.
+"""
+
+import os
+
+# Must be set before the app reads its settings. Rate limiting would throttle the load itself.
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("CHAT_CACHE_ENABLED", "false")
+
+import asyncio
+import itertools
+import json
+import math
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI
+
+from scripts.generate_data import GenerationConfig, bench_email, generate
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+Request = Tuple[str, str, dict]
+
+
+@dataclass
+class Scenario:
+    name: str
+    # (worker index, auth headers for that worker) -> (method, url, httpx kwargs)
+    build: Callable[[int, dict], Request]
+    authenticated: bool = False
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+
+def summarize(latencies: List[float], wall_seconds: float, errors: int) -> dict:
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "rps": round(len(values) / wall_seconds, 1) if wall_seconds else 0.0,
+        "mean_ms": round(sum(values) / len(values) * 1000, 2) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+    }
+
+
+def build_scenarios(password: str, users: int, feed_cursor: Optional[str]) -> List[Scenario]:
+    logins = itertools.count()
+    scenarios = [
+        Scenario("feed", lambda worker, headers: ("GET", "/posts/?limit=20", {})),
+        Scenario("mood_list", lambda worker, headers: ("GET", "/moods/?limit=50", {"headers": headers}), authenticated=True),
+        Scenario("journal_list", lambda worker, headers: ("GET", "/journals/?limit=20", {"headers": headers}), authenticated=True),
+        Scenario("mood_stats", lambda worker, headers: ("GET", "/moods/stats?days=30", {"headers": headers}), authenticated=True),
+        Scenario(
+            "login",
+            lambda worker, headers: (
+                "POST",
+                "/auth/login",
+                {"json": {"email": bench_email(next(logins) % users), "password": password}},
+            ),
+        ),
+        Scenario(
+            "chat",
+            lambda worker, headers: ("POST", "/ai/chat", {"json": {"message": f"I had a long day at work ({worker})", "history": []}}),
+        ),
+    ]
+    if feed_cursor:
+        # Later pages bypass the feed cache, so this tracks the keyset query itself.
+        scenarios.insert(1, Scenario("feed_page_2", lambda worker, headers: ("GET", f"/posts/?limit=20&cursor={feed_cursor}", {})))
+    return scenarios
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, auth: List[dict], requests: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    issued = itertools.count()
+
+    async def worker(index: int) -> None:
+        nonlocal errors
+        headers = auth[index % len(auth)] if scenario.authenticated else {}
+        while next(issued) < requests:
+            method, url, kwargs = scenario.build(index, headers)
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    # Warm-up fills caches and pools so the first scenario is not penalised.
+    for _ in range(min(concurrency, 10)):
+        method, url, kwargs = scenario.build(0, auth[0] if scenario.authenticated else {})
+        await client.request(method, url, **kwargs)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def prepare(config: GenerationConfig) -> None:
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config(str(BACKEND_DIR / "alembic.ini")), "head")
+    counts = generate(config)
+    print("generated " + (", ".join(f"{table}: {count}" for table, count in counts.items()) or "nothing (data already present)"))
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict]) -> List[str]:
+    lines = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        p95 = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+        rps = (result["rps"] - before["rps"]) / before["rps"] * 100 if before["rps"] else 0.0
+        lines.append(f"{name:<14} p95 {before['p95_ms']:>8.2f} -> {result['p95_ms']:>8.2f} ms ({p95:+.1f}%)  rps {rps:+.1f}%")
+    return lines
+
+
+async def bench(requests: int, concurrency: int, selected: Optional[set], config: GenerationConfig) -> Dict[str, dict]:
+    from app.main import app
+    from app.services import ai
+    from scripts.fake_openai import app as fake_openai_app
+
+    ai._client = AsyncOpenAI(
+        api_key="bench",
+        base_url="http://fake-openai/v1",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_openai_app)),
+    )
+    await app.router.startup()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60) as client:
+            auth = []
+            for index in range(max(1, min(concurrency, config.users))):
+                response = await client.post("/auth/login", json={"email": bench_email(index), "password": config.password})
+                response.raise_for_status()
+                auth.append({"Authorization": f"Bearer {response.json()['access_token']}"})
+            first_page = await client.get("/posts/?limit=20")
+            scenarios = build_scenarios(config.password, config.users, first_page.headers.get("x-next-cursor"))
+
+            results = {}
+            for scenario in scenarios:
+                if selected and scenario.name not in selected:
+                    continue
+                results[scenario.name] = await run_scenario(client, scenario, auth, requests, concurrency)
+                result = results[scenario.name]
+                print(
+                    f"{scenario.name:<14} {result['requests']:>6} {result['errors']:>6} {result['rps']:>8.1f} "
+                    f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f}"
+                )
+            return results
+    finally:
+        await app.router.shutdown()
+
+
+def main() -> int:
+    from app.db import engine
+
+    config = GenerationConfig.from_env()
+    requests = int(os.getenv("BENCH_REQUESTS", "500"))
+    concurrency = int(os.getenv("BENCH_CONCURRENCY", "10"))
+    selected = {name.strip() for name in os.getenv("BENCH_SCENARIOS", "").split(",") if name.strip()} or None
+    dialect = engine.dialect.name
+    baseline_path = Path(os.getenv("BENCH_BASELINE", BACKEND_DIR / "benchmarks" / f"baseline-{dialect}.json"))
+
+    if os.getenv("BENCH_PREPARE", "false").lower() == "true":
+        prepare(config)
+
+    print(f"{dialect}: {requests} requests per scenario, concurrency {concurrency}")
+    print(f"{'scenario':<14} {'reqs':>6} {'errors':>6} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    results = asyncio.run(bench(requests, concurrency, selected, config))
+
+    status = 0
+    if baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text())
+        print(f"\nvs. baseline {baseline_path} ({baseline.get('created_at', 'unknown date')})")
+        for line in compare(results, baseline["results"]):
+            print(line)
+        max_regression = float(os.getenv("BENCH_MAX_REGRESSION", "0"))
+        if max_regression:
+            for name, result in results.items():
+                before = baseline["results"].get(name)
+                if before and before["p95_ms"] and result["p95_ms"] > before["p95_ms"] * (1 + max_regression / 100):
+                    print(f"REGRESSION: {name} p95 is more than {max_regression:g}% over the baseline")
+                    status = 1
+
+    if os.getenv("BENCH_SAVE_BASELINE", "false").lower() == "true":
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(
+            json.dumps(
+                {
+                    "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+                    "dialect": dialect,
+                    "requests": requests,
+                    "concurrency": concurrency,
+                    "results": results,
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+        print(f"saved baseline to {baseline_path}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+"""Micro-benchmark: Aho-Corasick crisis matcher vs. the old per-keyword substring scan.
+
+Run from ``backend/`` with ``python -m scripts.bench_crisis``. Synthetic filler phrases
+grow the lexicon so the scaling with lexicon size is visible.
+"""
+
+import random
+import string
+import timeit
+
+from app.services.crisis import PhraseMatcher, load_phrases, normalize
+
+SAMPLE = (
+    "Today was long. I went for a walk after work, talked to my sister and tried the "
+    "breathing exercise before bed. Still a bit anxious about tomorrow's meeting though. "
+)
+
+
+def naive_detect(keywords, text: str) -> bool:
+    lowered = text.lower()
+    return any(keyword in lowered for keyword in keywords)
+
+
+def filler_phrases(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [
+        " ".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8))) for _ in range(rng.randint(1, 3)))
+        for _ in range(count)
+    ]
+
+
+def run(number: int = 2000) -> None:
+    base = load_phrases()
+    print(f"{'phrases':>8} {'chars':>7} {'naive us':>10} {'automaton us':>13} {'normalize us':>13}")
+    for extra in (0, 1000, 10000):
+        phrases = base + filler_phrases(extra)
+        keywords = [normalize(phrase).strip() for phrase in phrases]
+        matcher = PhraseMatcher(phrases)
+        for repeat in (1, 10):
+            text = SAMPLE * repeat
+            naive = timeit.timeit(lambda: naive_detect(keywords, text), number=number) / number * 1e6
+            fast = timeit.timeit(lambda: matcher.search(text), number=number) / number * 1e6
+            norm = timeit.timeit(lambda: normalize(text), number=number) / number * 1e6
+            print(f"{len(phrases):>8} {len(text):>7} {naive:>10.1f} {fast:>13.1f} {norm:>13.1f}")
+
+
+if __name__ == "__main__":
+    run()
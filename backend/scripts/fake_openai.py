@@ -0,0 +1,99 @@
+"""Minimal stand-in for the OpenAI Responses API, for local testing without network access.
+
+Run with ``uvicorn scripts.fake_openai:app --port 8001`` and start the API with
+``OPENAI_BASE_URL=http://localhost:8001/v1`` and any non-empty ``OPENAI_API_KEY``.
+``FAKE_OPENAI_DELAY_MS`` adds latency before the reply and between streamed chunks.
+``/v1/embeddings`` returns hashed bag-of-words vectors, so similar wording gives similar vectors.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+DELAY_SECONDS = int(os.getenv("FAKE_OPENAI_DELAY_MS", "0")) / 1000
+REPLY = "Thank you for sharing that with me. Let's take a slow breath together and look at one small next step."
+
+app = FastAPI(title="Fake OpenAI")
+
+
+def build_response(response_id: str, model: str, text: str, status: str = "completed") -> dict:
+    return {
+        "id": response_id,
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": model,
+        "status": status,
+        "output": [
+            {
+                "id": f"msg_{response_id}",
+                "type": "message",
+                "role": "assistant",
+                "status": status,
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            }
+        ],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {"input_tokens": 10, "output_tokens": len(text.split()), "total_tokens": 10 + len(text.split())},
+    }
+
+
+def sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+@app.post("/v1/responses")
+async def create_response(request: Request):
+    payload = await request.json()
+    model = payload.get("model", "fake-model")
+    response_id = f"resp_{uuid.uuid4().hex}"
+
+    if not payload.get("stream"):
+        await asyncio.sleep(DELAY_SECONDS)
+        return build_response(response_id, model, REPLY)
+
+    async def events():
+        yield sse({"type": "response.created", "response": build_response(response_id, model, "", "in_progress")})
+        for index, word in enumerate(REPLY.split(" ")):
+            await asyncio.sleep(DELAY_SECONDS)
+            yield sse(
+                {
+                    "type": "response.output_text.delta",
+                    "item_id": f"msg_{response_id}",
+                    "output_index": 0,
+                    "content_index": 0,
+                    "delta": word if index == 0 else f" {word}",
+                }
+            )
+        yield sse({"type": "response.completed", "response": build_response(response_id, model, REPLY)})
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def embed_text(text: str, dimensions: int = 64) -> list:
+    vector = [0.0] * dimensions
+    for word in text.lower().split():
+        vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % dimensions] += 1.0
+    return vector
+
+
+@app.post("/v1/embeddings")
+async def create_embeddings(request: Request):
+    payload = await request.json()
+    inputs = payload["input"] if isinstance(payload["input"], list) else [payload["input"]]
+    return {
+        "object": "list",
+        "model": payload.get("model", "fake-embedding"),
+        "data": [
+            {"object": "embedding", "index": index, "embedding": embed_text(text)}
+            for index, text in enumerate(inputs)
+        ],
+        "usage": {"prompt_tokens": 0, "total_tokens": 0},
+    }
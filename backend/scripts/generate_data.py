@@ -0,0 +1,155 @@
+"""Bulk synthetic data for load tests and benchmarks.
+
+Run from ``backend/`` with ``python -m scripts.generate_data`` after ``alembic upgrade head``.
+``GEN_USERS``, ``GEN_POSTS_PER_USER``, ``GEN_MOODS_PER_USER`` and ``GEN_JOURNALS_PER_USER``
+size the data set, spread over the last ``GEN_DAYS`` days. ``GEN_SEED`` makes the content
+reproducible (timestamps are relative to the run). Users are ``bench-<n>@example.com`` with
+password ``GEN_PASSWORD``; users that already exist are skipped, so reruns only top up.
+"""
+
+import os
+import random
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List
+
+from sqlalchemy import insert, select
+
+from app.core.http_cache import POSTS_SCOPE, version_bump_statement
+from app.core.security import hash_password
+from app.db import engine
+from app.models import JournalEntry, MoodEntry, Post, Profile, User
+from app.services.mood_stats import mood_deltas, rollup_statements
+
+EMAIL_DOMAIN = "example.com"
+MOODS = ["Calm", "Hopeful", "Reflective", "Anxious", "Tired", "Content", "Stressed", "Grateful"]
+ENERGIES = ["Low", "Steady", "High", None]
+CATEGORIES = ["Stress", "Self-Growth", "Wellness", "Sleep", "Relationships", None]
+WORDS = (
+    "today breathing walk friend sleep calm work family rest routine gentle small win boundary "
+    "music journal morning evening anxious hopeful tired grateful sunshine tea stretch talk "
+    "therapy plan meeting weekend quiet noise focus habit progress kind patient slow step"
+).split()
+
+
+@dataclass
+class GenerationConfig:
+    users: int = 200
+    posts_per_user: int = 10
+    moods_per_user: int = 60
+    journals_per_user: int = 20
+    days: int = 90
+    batch_size: int = 1000
+    seed: int = 42
+    password: str = "BenchPass123!"
+
+    @classmethod
+    def from_env(cls) -> "GenerationConfig":
+        return cls(
+            users=int(os.getenv("GEN_USERS", cls.users)),
+            posts_per_user=int(os.getenv("GEN_POSTS_PER_USER", cls.posts_per_user)),
+            moods_per_user=int(os.getenv("GEN_MOODS_PER_USER", cls.moods_per_user)),
+            journals_per_user=int(os.getenv("GEN_JOURNALS_PER_USER", cls.journals_per_user)),
+            days=int(os.getenv("GEN_DAYS", cls.days)),
+            batch_size=int(os.getenv("GEN_BATCH_SIZE", cls.batch_size)),
+            seed=int(os.getenv("GEN_SEED", cls.seed)),
+            password=os.getenv("GEN_PASSWORD", cls.password),
+        )
+
+
+def bench_email(index: int) -> str:
+    return f"bench-{index}@{EMAIL_DOMAIN}"
+
+
+def _chunks(items: List, size: int) -> Iterator[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _sentence(rng: random.Random, low: int, high: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high))).capitalize() + "."
+
+
+def _timestamp(rng: random.Random, now: datetime, days: int) -> datetime:
+    return now - timedelta(seconds=rng.randint(0, max(1, days * 86400)))
+
+
+def _insert_batched(conn, model, rows: Iterable[dict], batch_size: int) -> None:
+    for batch in _chunks(list(rows), batch_size):
+        conn.execute(insert(model), batch)
+
+
+def generate(config: GenerationConfig) -> Counter:
+    rng = random.Random(config.seed)
+    now = datetime.utcnow()
+    hashed_password = hash_password(config.password)
+    counts = Counter()
+
+    with engine.connect() as conn:
+        existing = set(conn.scalars(select(User.email).where(User.email.like(f"bench-%@{EMAIL_DOMAIN}"))))
+    emails = [bench_email(index) for index in range(config.users) if bench_email(index) not in existing]
+
+    # One transaction per chunk of users keeps memory flat and lets a long run be interrupted.
+    users_per_chunk = max(1, config.batch_size // max(1, config.moods_per_user + config.posts_per_user + config.journals_per_user))
+    for chunk in _chunks(emails, users_per_chunk):
+        with engine.begin() as conn:
+            user_ids = conn.scalars(
+                insert(User).returning(User.id, sort_by_parameter_order=True),
+                [
+                    {"email": email, "hashed_password": hashed_password, "is_active": True, "is_email_verified": True, "created_at": now}
+                    for email in chunk
+                ],
+            ).all()
+            counts["users"] += len(user_ids)
+
+            profiles, posts, moods, journals = [], [], [], []
+            for user_id in user_ids:
+                profiles.append({"user_id": user_id, "display_name": f"Bench user {user_id}", "is_anonymous": rng.random() < 0.5, "created_at": now})
+                for _ in range(config.posts_per_user):
+                    posts.append({
+                        "user_id": user_id,
+                        "title": _sentence(rng, 3, 8),
+                        "body": " ".join(_sentence(rng, 8, 20) for _ in range(rng.randint(2, 8))),
+                        "category": rng.choice(CATEGORIES),
+                        "created_at": _timestamp(rng, now, config.days),
+                    })
+                user_deltas = Counter()
+                for _ in range(config.moods_per_user):
+                    mood = {
+                        "user_id": user_id,
+                        "mood": rng.choice(MOODS),
+                        "energy": rng.choice(ENERGIES),
+                        "note": _sentence(rng, 3, 12) if rng.random() < 0.6 else None,
+                        "created_at": _timestamp(rng, now, config.days),
+                        "sync_version": 0,
+                    }
+                    moods.append(mood)
+                    user_deltas.update(mood_deltas(mood["created_at"], mood["mood"], mood["energy"]))
+                for stmt in rollup_statements(engine.dialect.name, user_id, user_deltas):
+                    conn.execute(stmt)
+                for _ in range(config.journals_per_user):
+                    journals.append({
+                        "user_id": user_id,
+                        "title": _sentence(rng, 2, 6),
+                        "body": " ".join(_sentence(rng, 8, 20) for _ in range(rng.randint(1, 6))),
+                        "gratitude": _sentence(rng, 3, 8) if rng.random() < 0.7 else None,
+                        "created_at": _timestamp(rng, now, config.days),
+                        "sync_version": 0,
+                    })
+
+            _insert_batched(conn, Profile, profiles, config.batch_size)
+            _insert_batched(conn, Post, posts, config.batch_size)
+            _insert_batched(conn, MoodEntry, moods, config.batch_size)
+            _insert_batched(conn, JournalEntry, journals, config.batch_size)
+            counts.update(profiles=len(profiles), posts=len(posts), moods=len(moods), journals=len(journals))
+
+    if counts["posts"]:
+        with engine.begin() as conn:
+            conn.execute(version_bump_statement(engine.dialect.name, POSTS_SCOPE))
+    return counts
+
+
+if __name__ == "__main__":
+    generated = generate(GenerationConfig.from_env())
+    print(", ".join(f"{table}: {count}" for table, count in generated.items()) or "nothing to generate")
@@ -1,10 +1,21 @@
+import asyncio
 import os
+
 from sqlalchemy.orm import Session
 
+from app.core.redis_client import close_redis
+from app.core.security import publish_user_change
 from app.db import SessionLocal
 from app.models import User
 
 
+async def publish(user_id: int) -> None:
+    try:
+        await publish_user_change(user_id)
+    finally:
+        await close_redis()
+
+
 def promote(email: str) -> None:
     db: Session = SessionLocal()
     try:
@@ -13,6 +24,9 @@ def promote(email: str) -> None:
             raise SystemExit(f"User not found: {email}")
         user.is_admin = True
         db.commit()
+        # With USER_CACHE_BACKEND=redis running API workers reload the user on its next request;
+        # with the default memory backend they pick the change up within USER_CACHE_TTL_SECONDS.
+        asyncio.run(publish(user.id))
         print(f"Promoted {email} to admin")
     finally:
         db.close()
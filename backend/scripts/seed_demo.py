@@ -1,12 +1,15 @@
 import os
 import random
+from collections import Counter
 from datetime import datetime
 
 from sqlalchemy.orm import Session
 
+from app.core.http_cache import POSTS_SCOPE, user_scope, version_bump_statement
 from app.core.security import hash_password
-from app.db import SessionLocal
+from app.db import SessionLocal, engine
 from app.models import JournalEntry, MoodEntry, Post, Profile, User
+from app.services.mood_stats import mood_deltas, rollup_statements
 
 
 def seed():
@@ -56,8 +59,14 @@ def seed():
         ]
 
         if not db.query(MoodEntry).filter(MoodEntry.user_id == user.id).first():
-            for mood, energy, note in mood_samples:
-                db.add(MoodEntry(user_id=user.id, mood=mood, energy=energy, note=note))
+            moods = [MoodEntry(user_id=user.id, mood=mood, energy=energy, note=note) for mood, energy, note in mood_samples]
+            db.add_all(moods)
+            db.flush()
+            deltas = Counter()
+            for entry in moods:
+                deltas.update(mood_deltas(entry.created_at, entry.mood, entry.energy))
+            for stmt in rollup_statements(engine.dialect.name, user.id, deltas):
+                db.execute(stmt)
 
         journal_samples = [
             ("Morning reflection", "I felt nervous but took a deep breath before work.", "Grateful for sunshine."),
@@ -68,6 +77,8 @@ def seed():
             for title, body, gratitude in journal_samples:
                 db.add(JournalEntry(user_id=user.id, title=title, body=body, gratitude=gratitude))
 
+        for scope in (POSTS_SCOPE, *(user_scope(resource, user.id) for resource in ("profile", "moods", "journals"))):
+            db.execute(version_bump_statement(engine.dialect.name, scope))
         db.commit()
         print(f"Seeded demo data for {demo_email}")
     finally:
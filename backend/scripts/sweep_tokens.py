@@ -0,0 +1,23 @@
+import asyncio
+import os
+
+from app.db import async_engine
+from app.services.token_sweeper import sweep_expired_tokens
+
+
+async def _sweep(batch_size: int) -> dict:
+    try:
+        return await sweep_expired_tokens(batch_size)
+    finally:
+        # Pooled aiosqlite connections keep their threads (and the process) alive until disposed.
+        await async_engine.dispose()
+
+
+def sweep(batch_size: int) -> None:
+    counts = asyncio.run(_sweep(batch_size))
+    for table, deleted in counts.items():
+        print(f"{table}: deleted {deleted}")
+
+
+if __name__ == "__main__":
+    sweep(int(os.getenv("TOKEN_SWEEP_BATCH_SIZE", "1000")))
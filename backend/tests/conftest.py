@@ -0,0 +1,124 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+TEST_DIR = Path(tempfile.mkdtemp(prefix="selenly-tests-"))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+FAKE_OPENAI_PORT = _free_port()
+
+# Settings are read once, when app.core.config is first imported, so the test environment
+# has to be in place before anything from ``app`` is imported. Assigned, not defaulted, so
+# a DATABASE_URL exported in the shell can never point the suite at a real database.
+os.environ.update(
+    {
+        "DATABASE_URL": f"sqlite:///{TEST_DIR / 'test.db'}",
+        "OPENAI_API_KEY": "test",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{FAKE_OPENAI_PORT}/v1",
+        "OPENAI_MAX_RETRIES": "0",
+        "CHAT_CACHE_ENABLED": "false",
+        "CHAT_HISTORY_SUMMARY": "false",
+        "RATE_LIMIT_ENABLED": "false",
+        "PASSWORD_HASH_WORKERS": "0",
+        "BCRYPT_ROUNDS": "4",
+    }
+)
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+import pytest  # noqa: E402
+import uvicorn  # noqa: E402
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """Migrate a fresh SQLite file once per run; tests isolate themselves by user."""
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    command.upgrade(config, "head")
+    yield
+
+
+@pytest.fixture(scope="session")
+def app(database):
+    from app.main import app
+
+    return app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def make_user(client):
+    """Create a fresh user and return bearer headers for it."""
+    def make(password: str = "Passw0rd!") -> dict:
+        email = f"user-{uuid.uuid4().hex[:12]}@example.com"
+        assert client.post("/auth/signup", json={"email": email, "password": password}).status_code == 200
+        response = client.post("/auth/login", json={"email": email, "password": password})
+        assert response.status_code == 200
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return make
+
+
+@pytest.fixture
+def auth(make_user):
+    return make_user()
+
+
+class UpstreamStub:
+    """ASGI wrapper around ``scripts.fake_openai`` that counts calls and can fail on demand."""
+
+    def __init__(self, app):
+        self.app = app
+        self.calls = 0
+        self.fail = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            self.calls += 1
+            if self.fail:
+                await send({"type": "http.response.start", "status": 500, "headers": [(b"content-type", b"application/json")]})
+                await send({"type": "http.response.body", "body": b'{"error": {"message": "upstream down", "type": "server_error"}}'})
+                return
+        await self.app(scope, receive, send)
+
+
+@pytest.fixture(scope="session")
+def fake_openai():
+    """Serve the fake OpenAI stub on the port ``OPENAI_BASE_URL`` points at."""
+    from scripts.fake_openai import app as stub_app
+
+    stub = UpstreamStub(stub_app)
+    server = uvicorn.Server(uvicorn.Config(stub, host="127.0.0.1", port=FAKE_OPENAI_PORT, log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("fake OpenAI stub did not start")
+        time.sleep(0.01)
+    yield stub
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
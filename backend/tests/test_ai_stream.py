@@ -0,0 +1,62 @@
+import json
+
+import httpx
+import pytest
+
+from app.services import ai
+from scripts.fake_openai import REPLY
+
+pytestmark = pytest.mark.anyio
+
+
+def parse_sse(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@pytest.fixture
+async def api(app, fake_openai):
+    fake_openai.fail = False
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    # The shared OpenAI client holds connections bound to this test's event loop.
+    await ai.close_client()
+
+
+async def stream(api, message: str, history=()) -> list:
+    response = await api.post("/ai/chat/stream", json={"message": message, "history": list(history)})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    return parse_sse(response.text)
+
+
+async def test_deltas_arrive_before_done(api, fake_openai):
+    events = await stream(api, "I had a long day at work", [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}])
+    names = [name for name, _ in events]
+    assert names[-1] == "done"
+    assert set(names[:-1]) == {"delta"} and len(names) > 2
+    assert "".join(data["text"] for name, data in events if name == "delta") == REPLY
+    assert events[-1][1] == {"flagged_crisis": False}
+
+
+async def test_crisis_message_never_reaches_upstream(api, fake_openai):
+    calls = fake_openai.calls
+    events = await stream(api, "I want to k1ll   myself")
+    assert events == [("delta", {"text": ai.CRISIS_REPLY}), ("done", {"flagged_crisis": True})]
+    assert fake_openai.calls == calls
+
+
+async def test_upstream_failure_becomes_error_event(api, fake_openai):
+    fake_openai.fail = True
+    events = await stream(api, "Can you help me plan my week?")
+    assert [name for name, _ in events] == ["error"]
+    assert events[0][1]["detail"]
+
+
+async def test_non_streaming_chat_uses_the_same_stub(api, fake_openai):
+    response = await api.post("/ai/chat", json={"message": "Hello there", "history": []})
+    assert response.status_code == 200
+    assert response.json() == {"reply": REPLY, "flagged_crisis": False}
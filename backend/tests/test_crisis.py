@@ -0,0 +1,46 @@
+import pytest
+
+from app.services.crisis import PhraseMatcher, detect_crisis, normalize
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "I want to kill myself",
+        "i want to k1ll myself",
+        "I want to kіll myself",  # Cyrillic "і"
+        "I want to ki​ll myself",  # zero-width space inside the word
+        "thinking about self   harm again",
+        "Self-harm is on my mind",
+        "I think I overdosed",
+        "sometimes I just want to die.",
+        "I can't go on anymore",
+        "SUICIDAL thoughts all week",
+    ],
+)
+def test_detects_crisis_phrases(text):
+    assert detect_crisis(text)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "I dont want to burn myself out",
+        "I cant go online today",
+        "I'll cut myself a slice of cake",
+        "I want to diet",
+        "I want to take my life back",
+        "I keep shooting myself in the foot at work",
+        "",
+    ],
+)
+def test_ignores_phrases_inside_longer_words(text):
+    assert not detect_crisis(text)
+
+
+def test_matcher_only_matches_whole_words():
+    matcher = PhraseMatcher(["want to die", "overdose"])
+    assert normalize("Want  to DIE...") == " want to die "
+    assert matcher.search("i want to die today") == "want to die"
+    assert matcher.search("i want to diet today") is None
+    assert matcher.search("i overdosed") is None
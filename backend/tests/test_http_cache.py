@@ -0,0 +1,42 @@
+import uuid
+
+
+def test_history_revalidates_with_304_until_a_write(client, auth):
+    first = client.get("/moods/", headers=auth)
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"].startswith("private")
+
+    cached = client.get("/moods/", headers={**auth, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    client.post("/moods/", json={"mood": "Calm"}, headers=auth)
+    fresh = client.get("/moods/", headers={**auth, "If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != etag
+    assert [row["mood"] for row in fresh.json()] == ["Calm"]
+
+
+def test_etag_differs_per_query_and_per_user(client, make_user):
+    owner, other = make_user(), make_user()
+    page = client.get("/moods/?limit=5", headers=owner).headers["etag"]
+    assert client.get("/moods/?limit=6", headers=owner).headers["etag"] != page
+    assert client.get("/moods/?limit=5", headers={**other, "If-None-Match": page}).status_code == 200
+
+
+def test_feed_etag_changes_when_a_post_is_written(client, auth):
+    category = f"etag-{uuid.uuid4().hex[:8]}"
+    etag = client.get("/posts/", params={"category": category}).headers["etag"]
+    assert client.get("/posts/", params={"category": category}, headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/posts/", json={"title": "t", "body": "b", "category": category}, headers=auth)
+    response = client.get("/posts/", params={"category": category}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+
+
+def test_wildcard_and_weak_tags_match(client, auth):
+    etag = client.get("/journals/", headers=auth).headers["etag"]
+    assert client.get("/journals/", headers={**auth, "If-None-Match": "*"}).status_code == 304
+    assert client.get("/journals/", headers={**auth, "If-None-Match": f'"other", {etag.removeprefix("W/")}'}).status_code == 304
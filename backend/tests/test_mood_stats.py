@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+
+def stats(client, auth, **params):
+    response = client.get("/moods/stats", params=params, headers=auth)
+    assert response.status_code == 200
+    return response.json()
+
+
+def days_ago(days: int) -> str:
+    return (datetime.utcnow() - timedelta(days=days)).replace(hour=12, minute=0, second=0, microsecond=0).isoformat()
+
+
+def test_daily_counts_scores_and_streaks(client, auth):
+    client.post(
+        "/moods/batch",
+        json={
+            "create": [
+                {"client_id": "a", "mood": "Calm", "energy": "High", "created_at": days_ago(0)},
+                {"client_id": "b", "mood": " calm ", "energy": "Low", "created_at": days_ago(0)},
+                {"client_id": "c", "mood": "Tired", "energy": "Low", "created_at": days_ago(1)},
+                {"client_id": "d", "mood": "Calm", "created_at": days_ago(3)},
+            ]
+        },
+        headers=auth,
+    )
+    result = stats(client, auth, days=7)
+    assert len(result["periods"]) == 7
+    today = result["periods"][-1]
+    # Values are normalized, so " calm " and "Calm" land in one bucket.
+    assert today["moods"] == {"calm": 2}
+    assert today["entries"] == 2
+    assert today["energy_score"] == 2.0
+    assert result["totals"] == {"entries": 4, "active_periods": 3}
+    assert result["current_streak"] == 2
+    assert result["longest_streak"] == 2
+
+
+def test_rollups_follow_updates_and_deletes(client, auth):
+    mood = client.post("/moods/", json={"mood": "Calm", "energy": "Steady"}, headers=auth).json()
+    client.put(f"/moods/{mood['id']}", json={"mood": "Hopeful"}, headers=auth)
+    assert stats(client, auth, days=1)["periods"][-1]["moods"] == {"hopeful": 1}
+
+    client.delete(f"/moods/{mood['id']}", headers=auth)
+    result = stats(client, auth, days=1)
+    assert result["periods"][-1]["entries"] == 0
+    assert result["totals"]["entries"] == 0
+
+
+def test_weekly_periods(client, auth):
+    client.post("/moods/", json={"mood": "Calm"}, headers=auth)
+    result = stats(client, auth, days=28, period="week")
+    assert result["period"] == "week"
+    assert all(datetime.fromisoformat(period["start"]).weekday() == 0 for period in result["periods"])
+    assert result["totals"]["entries"] == 1
@@ -0,0 +1,90 @@
+import uuid
+
+import pytest
+
+from app.core.pagination import NEXT_CURSOR_HEADER
+
+
+def create_moods(client, auth, timestamps):
+    items = [{"client_id": uuid.uuid4().hex, "mood": f"m{index}", "created_at": ts} for index, ts in enumerate(timestamps)]
+    response = client.post("/moods/batch", json={"create": items}, headers=auth)
+    assert response.status_code == 200
+    return [entry["id"] for entry in response.json()["created"]]
+
+
+def walk(client, path, auth, limit, params=None):
+    """Follow X-Next-Cursor to the end; returns the pages as lists of ids."""
+    pages, cursor = [], None
+    while True:
+        query = {"limit": limit, **(params or {})}
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get(path, params=query, headers=auth)
+        assert response.status_code == 200
+        pages.append([row["id"] for row in response.json()])
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return pages
+
+
+def test_moods_page_newest_first_with_ties_broken_by_id(client, auth):
+    # Three entries share a timestamp, so the (created_at, id) key has to break the tie.
+    ids = create_moods(
+        client,
+        auth,
+        ["2026-01-01T10:00:00", "2026-01-02T10:00:00", "2026-01-02T10:00:00", "2026-01-02T10:00:00", "2026-01-03T10:00:00"],
+    )
+    pages = walk(client, "/moods/", auth, limit=2)
+    assert [len(page) for page in pages] == [2, 2, 1]
+    flat = [row_id for page in pages for row_id in page]
+    assert flat == [ids[4], ids[3], ids[2], ids[1], ids[0]]
+
+
+def test_exact_multiple_of_limit_has_no_trailing_empty_page(client, auth):
+    create_moods(client, auth, [f"2026-02-0{day}T08:00:00" for day in range(1, 5)])
+    pages = walk(client, "/moods/", auth, limit=2)
+    assert [len(page) for page in pages] == [2, 2]
+
+
+def test_empty_history_has_no_cursor(client, auth):
+    response = client.get("/moods/", headers=auth)
+    assert response.status_code == 200
+    assert response.json() == []
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_since_until_window_accepts_utc_offsets(client, auth):
+    ids = create_moods(client, auth, ["2026-03-01T08:00:00", "2026-03-01T10:00:00", "2026-03-01T12:00:00"])
+    # 09:30+02:00 .. 12:30+02:00 is 07:30..10:30 UTC: the first two entries.
+    response = client.get(
+        "/moods/",
+        params={"since": "2026-03-01T09:30:00+02:00", "until": "2026-03-01T12:30:00+02:00"},
+        headers=auth,
+    )
+    assert [row["id"] for row in response.json()] == [ids[1], ids[0]]
+
+
+def test_history_is_scoped_to_the_caller(client, make_user):
+    owner, other = make_user(), make_user()
+    create_moods(client, owner, ["2026-04-01T08:00:00"])
+    assert client.get("/moods/", headers=other).json() == []
+
+
+def test_feed_pages_cover_every_post_once(client, auth):
+    category = f"pagination-{uuid.uuid4().hex[:8]}"
+    created = [
+        client.post("/posts/", json={"title": f"t{index}", "body": "b", "category": category}, headers=auth).json()["id"]
+        for index in range(5)
+    ]
+    pages = walk(client, "/posts/", None, limit=2, params={"category": category})
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [row_id for page in pages for row_id in page] == created[::-1]
+
+
+@pytest.mark.parametrize("path", ["/moods/", "/journals/", "/posts/", "/moods/changes", "/posts/search?q=calm"])
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", "WzFd"])
+def test_invalid_cursor_is_400(client, auth, path, cursor):
+    separator = "&" if "?" in path else "?"
+    response = client.get(f"{path}{separator}cursor={cursor}", headers=auth)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,47 @@
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.core.rate_limit import AdmissionControlMiddleware, Rate, normalize_path, parse_rules
+
+
+async def ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUST_FORWARDED", False)
+    middleware = AdmissionControlMiddleware(ok)
+    middleware.default_rate = Rate.parse("1/minute")
+    return middleware
+
+
+def test_normalize_path_folds_ids_and_trailing_slashes():
+    assert normalize_path("/posts/") == "/posts"
+    assert normalize_path("/posts/42") == "/posts/{id}"
+    assert normalize_path("/reports/7/status/") == "/reports/{id}/status"
+    assert normalize_path("/") == "/"
+    assert parse_rules("put /posts/{id}=2/minute") == {"PUT /posts/{id}": Rate.parse("2/minute")}
+
+
+def test_unruled_routes_get_their_own_default_bucket(limiter):
+    assert limiter.rule_for("GET", "/moods/") == ("GET /moods", limiter.default_rate)
+    assert limiter.rule_for("GET", "/journals/") == ("GET /journals", limiter.default_rate)
+    assert limiter.rule_for("POST", "/auth/login")[1] == Rate.parse("10/minute")
+
+
+@pytest.mark.anyio
+async def test_default_rate_is_applied_per_route(limiter):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=limiter), base_url="http://test") as client:
+        assert (await client.get("/moods/")).status_code == 200
+        assert (await client.get("/moods/")).status_code == 429
+        # Spending the /moods budget leaves other routes untouched...
+        assert (await client.get("/journals/")).status_code == 200
+        assert (await client.delete("/posts/1")).status_code == 200
+        # ...but every id of one route shares a bucket.
+        limited = await client.delete("/posts/2")
+        assert limited.status_code == 429
+        assert int(limited.headers["retry-after"]) >= 1
@@ -0,0 +1,59 @@
+import uuid
+
+
+def test_post_search_ranks_stems_and_marks_hits(client, auth):
+    word = f"zq{uuid.uuid4().hex[:8]}"
+    strong = client.post("/posts/", json={"title": f"{word} walks", "body": f"Walking helps. {word} every morning."}, headers=auth).json()
+    weak = client.post("/posts/", json={"title": "Other", "body": f"Once I tried {word}."}, headers=auth).json()
+    client.post("/posts/", json={"title": "Unrelated", "body": "Nothing to see"}, headers=auth)
+
+    results = client.get("/posts/search", params={"q": word}).json()
+    assert [result["id"] for result in results] == [strong["id"], weak["id"]]
+    assert f"<mark>{word}</mark>" in results[0]["snippet"]
+
+    # Porter stemming: "walked" finds "walks"/"Walking".
+    stemmed = client.get("/posts/search", params={"q": f"walked {word}"}).json()
+    assert [result["id"] for result in stemmed] == [strong["id"]]
+
+
+def test_snippets_escape_html(client, auth):
+    word = f"zq{uuid.uuid4().hex[:8]}"
+    client.post("/posts/", json={"title": "x", "body": f"<script>alert(1)</script> {word}"}, headers=auth)
+    snippet = client.get("/posts/search", params={"q": word}).json()[0]["snippet"]
+    assert "<script>" not in snippet
+    assert "&lt;script&gt;" in snippet
+
+
+def test_search_follows_edits_and_deletes(client, auth):
+    old, new = f"zq{uuid.uuid4().hex[:8]}", f"zq{uuid.uuid4().hex[:8]}"
+    post = client.post("/posts/", json={"title": "t", "body": old}, headers=auth).json()
+    client.put(f"/posts/{post['id']}", json={"body": new}, headers=auth)
+    assert client.get("/posts/search", params={"q": old}).json() == []
+    assert len(client.get("/posts/search", params={"q": new}).json()) == 1
+    client.delete(f"/posts/{post['id']}", headers=auth)
+    assert client.get("/posts/search", params={"q": new}).json() == []
+
+
+def test_search_pages_by_cursor(client, auth):
+    word = f"zq{uuid.uuid4().hex[:8]}"
+    for index in range(3):
+        client.post("/posts/", json={"title": f"t{index}", "body": word}, headers=auth)
+    first = client.get("/posts/search", params={"q": word, "limit": 2})
+    assert len(first.json()) == 2
+    rest = client.get("/posts/search", params={"q": word, "limit": 2, "cursor": first.headers["x-next-cursor"]})
+    assert len(rest.json()) == 1
+    assert "x-next-cursor" not in rest.headers
+
+
+def test_journal_search_is_private_to_the_author(client, make_user):
+    owner, other = make_user(), make_user()
+    word = f"zq{uuid.uuid4().hex[:8]}"
+    client.post("/journals/", json={"title": "Evening", "body": f"Felt {word} today"}, headers=owner)
+    assert len(client.get("/journals/search", params={"q": word}, headers=owner).json()) == 1
+    assert client.get("/journals/search", params={"q": word}, headers=other).json() == []
+
+
+def test_query_syntax_is_not_passed_through(client):
+    # Operators and quotes from the user must not turn into FTS syntax errors.
+    for query in ['"unbalanced', "a OR", "NEAR(", "*", "-"]:
+        assert client.get("/posts/search", params={"q": query}).status_code == 200
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.db import engine
+from app.models import SyncTombstone
+from app.services.sync import prune_tombstones
+
+
+def changes(client, auth, cursor=None, limit=None):
+    params = {}
+    if cursor:
+        params["cursor"] = cursor
+    if limit:
+        params["limit"] = limit
+    return client.get("/moods/changes", params=params, headers=auth)
+
+
+def test_replayed_batch_returns_stored_rows_without_duplicates(client, auth):
+    batch = {"create": [{"client_id": "a", "mood": "Calm"}, {"client_id": "b", "mood": "Tired", "energy": "Low"}]}
+    first = client.post("/moods/batch", json=batch, headers=auth).json()
+    replay = client.post("/moods/batch", json=batch, headers=auth).json()
+
+    assert [entry["client_id"] for entry in first["created"]] == ["a", "b"]
+    assert [entry["id"] for entry in replay["created"]] == [entry["id"] for entry in first["created"]]
+    assert len(client.get("/moods/", headers=auth).json()) == 2
+    # The replay must not count the entries twice in the rollups either.
+    assert client.get("/moods/stats", params={"days": 1}, headers=auth).json()["totals"]["entries"] == 2
+
+
+def test_batch_updates_and_deletes_by_client_id(client, auth):
+    client.post("/moods/batch", json={"create": [{"client_id": "a", "mood": "Calm"}, {"client_id": "b", "mood": "Calm"}]}, headers=auth)
+    result = client.post(
+        "/moods/batch",
+        json={
+            "update": [{"client_id": "a", "mood": "Hopeful"}, {"client_id": "missing", "mood": "x"}],
+            "delete": [{"client_id": "b"}],
+        },
+        headers=auth,
+    ).json()
+    assert [entry["mood"] for entry in result["updated"]] == ["Hopeful"]
+    assert len(result["deleted"]) == 1
+    assert result["not_found"] == [{"id": None, "client_id": "missing"}]
+
+
+def test_changes_stream_writes_then_tombstones(client, auth):
+    created = client.post("/moods/batch", json={"create": [{"client_id": c, "mood": "Calm"} for c in "abc"]}, headers=auth).json()["created"]
+    initial = changes(client, auth).json()
+    assert [entry["client_id"] for entry in initial["changes"]] == ["a", "b", "c"]
+    assert initial["deleted"] == [] and initial["has_more"] is False
+
+    client.post("/moods/batch", json={"update": [{"client_id": "a", "note": "later"}], "delete": [{"client_id": "b"}]}, headers=auth)
+    delta = changes(client, auth, initial["cursor"]).json()
+    assert [entry["client_id"] for entry in delta["changes"]] == ["a"]
+    assert delta["deleted"][0]["id"] == created[1]["id"]
+    assert delta["deleted"][0]["client_id"] == "b"
+
+    settled = changes(client, auth, delta["cursor"]).json()
+    assert settled["changes"] == [] and settled["deleted"] == []
+
+
+def test_changes_pages_with_has_more(client, auth):
+    client.post("/moods/batch", json={"create": [{"client_id": str(index), "mood": "Calm"} for index in range(5)]}, headers=auth)
+    seen, cursor = [], None
+    while True:
+        page = changes(client, auth, cursor, limit=2).json()
+        seen += [entry["client_id"] for entry in page["changes"]]
+        cursor = page["cursor"]
+        if not page["has_more"]:
+            break
+    assert seen == ["0", "1", "2", "3", "4"]
+
+
+def test_cursor_behind_pruned_tombstones_gets_410(client, auth):
+    created = client.post("/moods/batch", json={"create": [{"client_id": "a", "mood": "Calm"}, {"client_id": "b", "mood": "Calm"}]}, headers=auth).json()["created"]
+    stale = changes(client, auth).json()["cursor"]
+    client.post("/moods/batch", json={"delete": [{"client_id": "a"}]}, headers=auth)
+    current = changes(client, auth, stale).json()["cursor"]
+
+    # Age the tombstone past the retention window, then prune.
+    with engine.begin() as conn:
+        conn.execute(
+            update(SyncTombstone)
+            .where(SyncTombstone.entry_id == created[0]["id"])
+            .values(deleted_at=datetime.utcnow() - timedelta(days=365))
+        )
+    assert client.portal.call(prune_tombstones, 1000, datetime.utcnow()) >= 1
+
+    expired = changes(client, auth, stale)
+    assert expired.status_code == 410
+    # A client that already saw the deletion, or one starting over, is unaffected.
+    assert changes(client, auth, current).status_code == 200
+    assert changes(client, auth).json()["deleted"] == []
+
+
+def test_oversized_batch_is_rejected(client, auth):
+    items = [{"client_id": str(index), "mood": "Calm"} for index in range(settings.SYNC_MAX_BATCH_SIZE + 1)]
+    assert client.post("/moods/batch", json={"create": items}, headers=auth).status_code == 413